@@ -0,0 +1,79 @@
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Tuple
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.casefold().replace("ё", "е").split())
+
+
+class PrefixIndex:
+    """Sorted in-memory prefix index over company names, tags and services.
+
+    Every word start of a term is indexed, so "дост" finds both "Доставка"
+    and "Быстрая доставка". Lookups are a bisect plus a short scan and never
+    touch the database.
+    """
+
+    def __init__(self):
+        # (normalized word-start suffix, word position, entry key); position 0
+        # sorts whole-term matches ahead of mid-term ones for the same suffix
+        self._keys: List[Tuple[str, int, tuple]] = []
+        self._entries: Dict[tuple, dict] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _entry_key(self, kind: str, text: str, company_id: int) -> tuple:
+        # Company names stay distinct per company; tags/services are shared
+        return (kind, company_id) if kind == "company" else (kind, _normalize(text))
+
+    def _suffixes(self, text: str) -> List[Tuple[str, int]]:
+        words = _normalize(text).split(" ")
+        return [(" ".join(words[i:]), i) for i in range(len(words)) if words[i]]
+
+    def _add(self, kind: str, text: str, company_id: int, keys: list):
+        entry_key = self._entry_key(kind, text, company_id)
+        entry = self._entries.get(entry_key)
+        if entry is None:
+            entry = self._entries[entry_key] = {"text": text, "type": kind, "company_ids": set()}
+            for suffix, position in self._suffixes(text):
+                keys.append((suffix, position, entry_key))
+        entry["company_ids"].add(company_id)
+
+    def add(self, kind: str, text: str, company_id: int):
+        new_keys = []
+        self._add(kind, text, company_id, new_keys)
+        for key in new_keys:
+            insort(self._keys, key)
+
+    def rebuild(self, items: Iterable[Tuple[str, str, int]]):
+        """Replace the whole index from (kind, text, company_id) rows"""
+        self._entries = {}
+        keys = []
+        for kind, text, company_id in items:
+            if text:
+                self._add(kind, text, company_id, keys)
+        keys.sort()
+        self._keys = keys
+
+    def search(self, prefix: str, limit: int = 10) -> List[dict]:
+        prefix = _normalize(prefix)
+        if not prefix:
+            return []
+        results, seen = [], set()
+        position = bisect_left(self._keys, (prefix,))
+        while position < len(self._keys) and len(results) < limit:
+            suffix, _, entry_key = self._keys[position]
+            if not suffix.startswith(prefix):
+                break
+            position += 1
+            if entry_key in seen:
+                continue
+            seen.add(entry_key)
+            entry = self._entries[entry_key]
+            if entry["type"] == "company":
+                results.append({"text": entry["text"], "type": "company", "id": entry_key[1]})
+            else:
+                results.append({"text": entry["text"], "type": entry["type"],
+                                "count": len(entry["company_ids"])})
+        return results
@@ -0,0 +1,142 @@
+"""Compare building and serializing company cards.
+
+pydantic  - the previous read path: Company(**card) with nested Review models
+            (20 validated fields each), then model_dump during serialization
+slots     - read_models.CompanyCard.from_card, serialized natively by orjson
+
+Cards are synthetic dicts shaped like company_cards.card, so no database is
+needed. CPU time is the best of --repeat runs over all cards; allocations
+are the tracemalloc peak while building the cards and the bytes still held
+by the built list.
+
+Usage (from backend/):
+    python benchmarks/bench_company_cards.py --companies 10000 --reviews 3
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from json_response import dumps  # noqa: E402
+from read_models import CompanyCard  # noqa: E402
+
+
+# Copies of the pydantic models in main.py; importing main would need a database URL
+class Review(BaseModel):
+    id: int
+    author: str
+    rating: int
+    text: str
+    date: str
+
+
+class Company(BaseModel):
+    id: int
+    name: str
+    category: Optional[str]
+    description: str
+    rating: float
+    reviewsCount: int
+    verified: bool
+    inn: str
+    region: str
+    yearFounded: int
+    employees: str
+    tags: List[str]
+    logo: str
+    phone: str
+    email: str
+    website: str
+    completedDeals: int
+    responseTime: str
+    services: List[str]
+    reviews: List[Review]
+
+
+def synthetic_cards(count, reviews):
+    return [
+        {
+            "id": i,
+            "name": f"ООО Компания {i}",
+            "category": ("manufacturing", "logistics", "it")[i % 3],
+            "description": "Производство и поставка промышленного оборудования. " * 3,
+            "rating": 4.5,
+            "reviewsCount": reviews,
+            "verified": bool(i % 2),
+            "inn": f"{7700000000 + i}",
+            "region": "Москва",
+            "yearFounded": 2000 + i % 20,
+            "employees": "50-100",
+            "tags": ["оборудование", "поставки", "b2b"],
+            "logo": "🏭",
+            "phone": "+7 (495) 123-45-67",
+            "email": f"info{i}@example.ru",
+            "website": f"https://company{i}.example.ru",
+            "completedDeals": i % 300,
+            "responseTime": "2 часа",
+            "services": ["Монтаж", "Сервис", "Доставка"],
+            "reviews": [
+                {"id": i * reviews + r, "author": "Иван", "rating": 5,
+                 "text": "Отличная работа, рекомендую.", "date": "2024-05-01"}
+                for r in range(reviews)
+            ],
+        }
+        for i in range(count)
+    ]
+
+
+def build_pydantic(cards):
+    return [Company(**card) for card in cards]
+
+
+def build_slots(cards):
+    return [CompanyCard.from_card(card) for card in cards]
+
+
+def best_time(function, argument, repeat):
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.process_time()
+        function(argument)
+        timings.append(time.process_time() - started)
+    return min(timings) * 1000
+
+
+def allocations(build, cards):
+    gc.collect()
+    tracemalloc.start()
+    built = build(cards)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del built
+    return peak / 2**20, retained / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--companies", type=int, default=10000)
+    parser.add_argument("--reviews", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    cards = synthetic_cards(args.companies, args.reviews)
+    print(f"{len(cards)} companies, {args.reviews} reviews each")
+    for name, build in (("pydantic", build_pydantic), ("slots", build_slots)):
+        built = build(cards)
+        build_ms = best_time(build, cards, args.repeat)
+        serialize_ms = best_time(dumps, built, args.repeat)
+        peak, retained = allocations(build, cards)
+        print(f"{name:<9} build={build_ms:7.1f}ms  serialize={serialize_ms:6.1f}ms  "
+              f"total={build_ms + serialize_ms:7.1f}ms  peak={peak:6.1f}MiB  retained={retained:6.1f}MiB")
+
+
+if __name__ == "__main__":
+    main()
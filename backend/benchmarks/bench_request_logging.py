@@ -0,0 +1,112 @@
+"""Measure per-request overhead of the access logging middleware.
+
+none       - no request logging
+legacy     - the old log_requests middleware: emoji f-strings, header dump and
+             await request.body() on the event loop, synchronous StreamHandler
+structured - RequestLoggingMiddleware behind configure_logging() (QueueHandler,
+             JSON records written by the listener thread)
+
+Runs in-process against a minimal app; no database needed. Log output goes to
+os.devnull so terminal speed does not skew the numbers.
+
+Usage (from backend/):
+    python benchmarks/bench_request_logging.py --requests 5000 --sample-rate 1
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import httpx
+from fastapi import FastAPI, Request
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from structured_logging import TEXT_FORMAT, RequestLoggingMiddleware, configure_logging  # noqa: E402
+
+PAYLOAD = {"name": "Бенчмарк", "description": "x" * 400, "tags": ["a", "b", "c"]}
+
+legacy_logger = logging.getLogger("legacy")
+
+
+async def log_requests(request: Request, call_next):
+    start_time = datetime.now()
+    legacy_logger.info(f"🔵 REQUEST: {request.method} {request.url}")
+    sanitized_headers = {
+        key: value
+        for key, value in request.headers.items()
+        if key.lower() not in {"authorization"}
+    }
+    if sanitized_headers:
+        legacy_logger.info(f"🔵 Headers: {sanitized_headers}")
+    if request.method in ["POST", "PUT", "PATCH"]:
+        body = await request.body()
+        if body:
+            legacy_logger.info(f"🔵 Body: {body.decode('utf-8')[:500]}...")
+    response = await call_next(request)
+    process_time = datetime.now() - start_time
+    legacy_logger.info(f"🟢 RESPONSE: {response.status_code} - {process_time.total_seconds():.3f}s")
+    return response
+
+
+def build_app(variant, sample_rate):
+    app = FastAPI()
+
+    @app.get("/companies/")
+    async def list_companies():
+        return [{"id": i, "name": f"Company {i}"} for i in range(20)]
+
+    @app.post("/companies/")
+    async def create_company(company: dict):
+        return {"id": 1, **company}
+
+    if variant == "legacy":
+        app.middleware("http")(log_requests)
+    elif variant == "structured":
+        app.add_middleware(RequestLoggingMiddleware, default_sample_rate=sample_rate)
+    return app
+
+
+async def measure(variant, app, requests):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        samples = []
+        for i in range(requests):
+            started = time.perf_counter()
+            if i % 2:
+                await client.post("/companies/", json=PAYLOAD)
+            else:
+                await client.get("/companies/")
+            samples.append((time.perf_counter() - started) * 1000)
+    percentiles = statistics.quantiles(samples, n=100)
+    print(f"{variant:<11} p50={percentiles[49]:6.3f}ms  p99={percentiles[98]:6.3f}ms  "
+          f"mean={statistics.fmean(samples):6.3f}ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--sample-rate", type=float, default=1.0)
+    args = parser.parse_args()
+
+    devnull = open(os.devnull, "w")
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+
+    await measure("none", build_app("none", args.sample_rate), args.requests)
+
+    handler = logging.StreamHandler(devnull)
+    handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    root.handlers = [handler]
+    await measure("legacy", build_app("legacy", args.sample_rate), args.requests)
+
+    configure_logging(log_format="json", stream=devnull)
+    await measure("structured", build_app("structured", args.sample_rate), args.requests)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,158 @@
+import asyncio
+import logging
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Raw COPY chunks buffered between the database and a slow client
+COPY_QUEUE_SIZE = 16
+
+# Declared precision/scale of DECIMAL columns; the row description asyncpg
+# exposes has no type modifiers, so they come from the catalog
+NUMERIC_COLUMNS_QUERY = """
+    SELECT column_name, numeric_precision, numeric_scale
+    FROM information_schema.columns
+    WHERE table_schema = current_schema() AND table_name = $1
+      AND data_type = 'numeric' AND numeric_precision IS NOT NULL
+"""
+# Widest precision pa.decimal128 can hold
+MAX_DECIMAL128_PRECISION = 38
+
+
+async def stream_copy_csv(pool, query: str, *args) -> AsyncIterator[bytes]:
+    """Stream ``COPY (query) TO STDOUT`` as CSV with a header row.
+
+    asyncpg hands COPY data to a callback; a small bounded queue couples it to
+    the response, so a slow reader pauses the COPY instead of buffering the
+    table in memory.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=COPY_QUEUE_SIZE)
+
+    async def run_copy():
+        async with pool.acquire() as connection:
+            await connection.copy_from_query(
+                query, *args, output=queue.put, format="csv", header=True
+            )
+
+    task = asyncio.create_task(run_copy())
+    try:
+        while not (task.done() and queue.empty()):
+            getter = asyncio.ensure_future(queue.get())
+            await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+            if getter.done():
+                yield getter.result()
+            else:
+                getter.cancel()
+        # Re-raise COPY errors; headers are already sent, so the client
+        # only sees a truncated file
+        task.result()
+    finally:
+        # Client went away mid-stream: stop the COPY and release the connection
+        task.cancel()
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class _ChunkSink:
+    """Write-only file object whose contents are drained after every row group"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+def _arrow_column(pa, type_name: str, decimal: Optional[Tuple[int, int]] = None):
+    """Arrow type for a Postgres type name plus an optional value converter.
+
+    ``decimal`` is the column's declared (precision, scale), if known.
+    """
+    numeric = {
+        "int2": pa.int16(), "int4": pa.int32(), "int8": pa.int64(),
+        "float4": pa.float32(), "float8": pa.float64(), "bool": pa.bool_(),
+        "date": pa.date32(), "timestamp": pa.timestamp("us"),
+        "timestamptz": pa.timestamp("us", tz="UTC"),
+    }
+    if type_name in numeric:
+        return numeric[type_name], None
+    if type_name == "numeric":
+        if decimal is not None and decimal[0] <= MAX_DECIMAL128_PRECISION:
+            return pa.decimal128(*decimal), None
+        # Unconstrained or computed NUMERIC: text keeps the exact value
+        return pa.string(), str
+    return pa.string(), str
+
+
+async def _numeric_columns(connection, table: Optional[str]) -> Dict[str, Tuple[int, int]]:
+    if table is None:
+        return {}
+    rows = await connection.fetch(NUMERIC_COLUMNS_QUERY, table)
+    return {row["column_name"]: (row["numeric_precision"], row["numeric_scale"]) for row in rows}
+
+
+async def stream_parquet(
+    pool, query: str, *args, batch_size: int = 10000, table: Optional[str] = None
+) -> AsyncIterator[bytes]:
+    """Stream query results as a Parquet file, one row group per cursor batch.
+
+    Only one batch of rows and one encoded row group are held in memory at a
+    time. Columns of ``table`` declared DECIMAL(p, s) are written as exact
+    decimals; other NUMERIC values as text. Requires the optional
+    ``pyarrow`` package.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _ChunkSink()
+    async with pool.acquire() as connection:
+        # Server-side cursors only live inside a transaction
+        async with connection.transaction():
+            decimals = await _numeric_columns(connection, table)
+            statement = await connection.prepare(query)
+            columns = [(attr.name, *_arrow_column(pa, attr.type.name, decimals.get(attr.name)))
+                       for attr in statement.get_attributes()]
+            schema = pa.schema([(name, arrow_type) for name, arrow_type, _ in columns])
+            writer = pq.ParquetWriter(sink, schema)
+            try:
+                cursor = await statement.cursor(*args)
+                while True:
+                    rows = await cursor.fetch(batch_size)
+                    if not rows:
+                        break
+                    arrays = []
+                    for index, (_, arrow_type, convert) in enumerate(columns):
+                        values = [row[index] for row in rows]
+                        if convert is not None:
+                            values = [None if value is None else convert(value) for value in values]
+                        arrays.append(pa.array(values, type=arrow_type))
+                    writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+                    yield sink.drain()
+            finally:
+                writer.close()
+    # Footer written by close()
+    yield sink.drain()
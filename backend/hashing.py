@@ -0,0 +1,66 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+# bcrypt releases the GIL while hashing, so a small thread pool gives real
+# parallelism without the pickling overhead of a process pool.
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", "4"))
+# How many hashing jobs may wait for a free worker before we shed load.
+HASH_QUEUE_LIMIT = int(os.getenv("HASH_QUEUE_LIMIT", "32"))
+
+
+class PasswordHasher:
+    """Runs bcrypt hash/verify off the event loop on a bounded worker pool.
+
+    Jobs beyond ``max_workers + queue_limit`` are rejected with 503 instead of
+    queueing forever, so a login storm degrades into fast retries rather than
+    freezing every other request.
+    """
+
+    def __init__(self, context: CryptContext, max_workers: int = HASH_WORKERS,
+                 queue_limit: int = HASH_QUEUE_LIMIT):
+        self._context = context
+        self._max_workers = max_workers
+        self._queue_limit = queue_limit
+        self._executor: ThreadPoolExecutor | None = None
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def start(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._max_workers, thread_name_prefix="bcrypt"
+            )
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, func, *args):
+        if self._pending >= self._max_workers + self._queue_limit:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication service is busy, please retry",
+                headers={"Retry-After": "1"},
+            )
+        self.start()
+        # The counter is only touched from the event loop thread, so no lock.
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self._pending -= 1
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(self._context.verify, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self._context.hash, password)
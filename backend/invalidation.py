@@ -0,0 +1,108 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+# Channel the notify_cache_invalidation() triggers in schema.sql publish to
+CACHE_INVALIDATION_CHANNEL = "cache_invalidation"
+
+# Handlers get the changed row key (e.g. a username) or None for "anything changed"
+InvalidationHandler = Callable[[Optional[str]], None]
+
+
+class InvalidationListener:
+    """Keeps per-worker caches coherent by LISTENing for table change notices.
+
+    Caches register a handler per table. The listener holds one dedicated
+    connection outside the pool; if it drops, notifications sent meanwhile
+    are lost, so every handler is called with ``None`` and the connection
+    is re-established in the background.
+    """
+
+    def __init__(self, dsn: str, channel: str = CACHE_INVALIDATION_CHANNEL,
+                 reconnect_delay: float = 5.0):
+        self.dsn = dsn
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self._handlers: Dict[str, List[InvalidationHandler]] = defaultdict(list)
+        self._connection = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def register(self, table: str, handler: InvalidationHandler):
+        self._handlers[table].append(handler)
+
+    def dispatch(self, payload: str):
+        try:
+            message = json.loads(payload)
+            table, key = message["table"], message.get("key")
+        except (ValueError, KeyError, TypeError):
+            logger.warning(f"⚠️ Ignoring malformed cache invalidation: {payload!r}")
+            return
+        self._call(self._handlers.get(table, ()), key)
+
+    def invalidate_all(self):
+        for handlers in self._handlers.values():
+            self._call(handlers, None)
+
+    def _call(self, handlers, key: Optional[str]):
+        for handler in handlers:
+            try:
+                handler(key)
+            except Exception as e:
+                logger.error(f"❌ Cache invalidation handler failed: {e}")
+
+    def _on_notification(self, connection, pid, channel, payload):
+        self.dispatch(payload)
+
+    def _on_termination(self, connection):
+        self._connection = None
+        if self._stopping:
+            return
+        logger.warning("⚠️ Cache invalidation listener disconnected, dropping local caches")
+        self.invalidate_all()
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _connect(self):
+        connection = await asyncpg.connect(self.dsn)
+        await connection.add_listener(self.channel, self._on_notification)
+        connection.add_termination_listener(self._on_termination)
+        self._connection = connection
+
+    async def _reconnect(self):
+        while not self._stopping:
+            await asyncio.sleep(self.reconnect_delay)
+            try:
+                await self._connect()
+            except Exception as e:
+                logger.error(f"❌ Cache invalidation listener reconnect failed: {e}")
+                continue
+            # Anything may have changed while we were not listening
+            self.invalidate_all()
+            logger.info("👂 Cache invalidation listener reconnected")
+            return
+
+    async def start(self):
+        self._stopping = False
+        try:
+            await self._connect()
+        except Exception as e:
+            logger.error(f"❌ Cache invalidation listener failed to connect: {e}")
+            self._reconnect_task = asyncio.create_task(self._reconnect())
+            return
+        logger.info(f"👂 Listening for cache invalidations on '{self.channel}'")
+
+    async def stop(self):
+        self._stopping = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        if self._connection is not None:
+            connection, self._connection = self._connection, None
+            await connection.close()
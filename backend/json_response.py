@@ -0,0 +1,41 @@
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from asyncpg import Record
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+# Keys of GROUP BY results and similar may be ints; jsonable_encoder allowed that too
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _default(value: Any) -> Any:
+    """Types orjson does not handle natively; datetime, date and UUID are native"""
+    if isinstance(value, Record):
+        return dict(value)
+    if isinstance(value, Decimal):
+        # Same as jsonable_encoder: whole numbers stay ints, the rest become floats
+        exponent = value.as_tuple().exponent
+        return int(value) if isinstance(exponent, int) and exponent >= 0 else float(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize API content, including asyncpg Records, straight to JSON bytes"""
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered by orjson.
+
+    Endpoints that return ``FastJSONResponse(rows)`` with asyncpg Records
+    skip both ``dict(row)`` copies and FastAPI's ``jsonable_encoder`` pass.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,26 +1,40 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Request
+from fastapi import FastAPI, Depends, HTTPException, status, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.datastructures import Default
+from starlette.concurrency import run_in_threadpool
 import os
+import io
+import codecs
+import csv
+import json
 import logging
+from itertools import islice
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta, UTC
 from typing import Optional, List
-from pydantic import BaseModel
-import databases
+from pydantic import BaseModel, ValidationError
 from contextlib import asynccontextmanager
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+from hashing import PasswordHasher
+from pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
+from response_cache import ResponseCache
+from json_response import FastJSONResponse
+from read_models import CompanyCard
+from autocomplete import PrefixIndex
+from structured_logging import configure_logging, RequestLoggingMiddleware, request_logging_options_from_env
+from profiling import PROFILING_ENABLED, ProfilingMiddleware, ProfiledRoute, ProfiledDatabase, profiled
+from metrics import METRICS_ENABLED, MetricsMiddleware, mark_worker_stopped, metrics_response
+from pool import pool_options_from_env
+
+# Configure logging (queue-backed, LOG_LEVEL / LOG_FORMAT from env)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Database connection
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://user:password@db:5432/globex")
-database = databases.Database(DATABASE_URL)
+# databases passes extra options straight through to asyncpg.create_pool
+database = ProfiledDatabase(DATABASE_URL, **pool_options_from_env())
 
 # Lifespan manager for database connections
 @asynccontextmanager
@@ -28,12 +42,20 @@ async def lifespan(app: FastAPI):
     # Startup
     await database.connect()
     logger.info("🗄️ Database connected successfully")
+    password_hasher.start()
+    await load_autocomplete_index()
     yield
     # Shutdown
+    password_hasher.shutdown()
+    mark_worker_stopped()
     await database.disconnect()
     logger.info("🗄️ Database disconnected")
 
-app = FastAPI(lifespan=lifespan)
+# orjson for every JSON response; Default() keeps the response_model fast path
+app = FastAPI(lifespan=lifespan, default_response_class=Default(FastJSONResponse))
+if PROFILING_ENABLED:
+    # Must be set before any route is declared
+    app.router.route_class = ProfiledRoute
 
 # Add CORS middleware
 app.add_middleware(
@@ -51,37 +73,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Add request logging middleware
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    start_time = datetime.now()
-
-    # Log request
-    logger.info(f"🔵 REQUEST: {request.method} {request.url}")
-
-    sanitized_headers = {
-        key: value
-        for key, value in request.headers.items()
-        if key.lower() not in {"authorization"}
-    }
-    if sanitized_headers:
-        logger.info(f"🔵 Headers: {sanitized_headers}")
-    if request.method in ["POST", "PUT", "PATCH"] and request.url.path != "/token":
-        try:
-            body = await request.body()
-            if body:
-                logger.info(f"🔵 Body: {body.decode('utf-8')[:500]}...")
-        except Exception as e:
-            logger.error(f"❌ Error reading request body: {e}")
-    
-    # Process request
-    response = await call_next(request)
-    
-    # Log response
-    process_time = datetime.now() - start_time
-    logger.info(f"🟢 RESPONSE: {response.status_code} - {process_time.total_seconds():.3f}s")
-    
-    return response
+# Structured access log, sampled per route (see env.example)
+app.add_middleware(RequestLoggingMiddleware, **request_logging_options_from_env())
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+# Opt-in (PROFILE_REQUESTS=true): Server-Timing header and per-request query log
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
 
 # --- Configuration ---
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key")
@@ -97,6 +95,9 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+# Async entry point used by request handlers; keeps bcrypt off the event loop
+password_hasher = PasswordHasher(pwd_context)
+
 # --- JWT Token Handling ---
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
@@ -159,7 +160,7 @@ async def authenticate_user(username: str, password: str):
     user = await get_user(username)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await password_hasher.verify(password, user.hashed_password):
         return None
     return user
 
@@ -188,6 +189,7 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
     return current_user
 
 # --- Company Models ---
+# Request validation and OpenAPI schema; reads are served as read_models.CompanyCard
 class Review(BaseModel):
     id: int
     author: str
@@ -198,7 +200,7 @@ class Review(BaseModel):
 class Company(BaseModel):
     id: int
     name: str
-    category: str
+    category: Optional[str]
     description: str
     rating: float
     reviewsCount: int
@@ -218,117 +220,69 @@ class Company(BaseModel):
     reviews: List[Review]
 
 # --- Database Company Functions ---
-async def get_companies_from_db(skip: int = 0, limit: int = 10):
-    # Main company query
-    query = """
-        SELECT c.*, cat.id as category_id
-        FROM companies c
-        LEFT JOIN categories cat ON c.category_id = cat.id
-        ORDER BY c.id
-        LIMIT :limit OFFSET :skip
-    """
-    companies_records = await database.fetch_all(query, values={"skip": skip, "limit": limit})
-
-    if not companies_records:
-        return []
-
-    company_ids = [company_record["id"] for company_record in companies_records]
-    tags_map = await _fetch_related_values("company_tags", "tag", company_ids)
-    services_map = await _fetch_related_values("company_services", "service", company_ids)
-    reviews_map = await _fetch_reviews(company_ids)
+# Cards are assembled by triggers into company_cards (see schema.sql), so a
+# read is a primary-key scan over ready-to-serve JSONB with no joins.
+async def get_companies_from_db(skip: int = 0, limit: int = 10, after_id: Optional[int] = None):
+    # Keyset on the primary key when a cursor is given
+    if after_id is not None:
+        query = """
+            SELECT card FROM company_cards
+            WHERE company_id > :after_id
+            ORDER BY company_id
+            LIMIT :limit
+        """
+        values = {"after_id": after_id, "limit": limit}
+    else:
+        query = """
+            SELECT card FROM company_cards
+            ORDER BY company_id
+            LIMIT :limit OFFSET :skip
+        """
+        values = {"skip": skip, "limit": limit}
+    companies_records = await database.fetch_all(query, values=values)
 
-    return [
-        _build_company(company_record, tags_map, services_map, reviews_map)
-        for company_record in companies_records
-    ]
+    return [_build_company(company_record) for company_record in companies_records]
 
 async def get_company_from_db(company_id: int):
-    company_query = """
-        SELECT c.*, cat.id as category_id
-        FROM companies c
-        LEFT JOIN categories cat ON c.category_id = cat.id
-        WHERE c.id = :company_id
-    """
+    company_query = "SELECT card FROM company_cards WHERE company_id = :company_id"
     company_record = await database.fetch_one(company_query, values={"company_id": company_id})
     if not company_record:
         return None
 
-    tags_map = await _fetch_related_values("company_tags", "tag", [company_id])
-    services_map = await _fetch_related_values("company_services", "service", [company_id])
-    reviews_map = await _fetch_reviews([company_id])
+    return _build_company(company_record)
 
-    return _build_company(company_record, tags_map, services_map, reviews_map)
 
-
-async def _fetch_related_values(table: str, column: str, company_ids: List[int]):
-    if not company_ids:
-        return {}
-
-    query = f"""
-        SELECT company_id, {column}
-        FROM {table}
-        WHERE company_id = ANY(:company_ids)
-        ORDER BY company_id
+async def search_companies_in_db(q: str, skip: int = 0, limit: int = 10):
+    # The query is parsed with both configs so Russian and English stems match
+    query = """
+        SELECT card
+        FROM company_cards,
+             (SELECT websearch_to_tsquery('russian', :q) || websearch_to_tsquery('english', :q) as query) tsq
+        WHERE search_vector @@ tsq.query
+        ORDER BY ts_rank(search_vector, tsq.query) DESC, company_id
+        LIMIT :limit OFFSET :skip
     """
-    records = await database.fetch_all(query, values={"company_ids": company_ids})
+    records = await database.fetch_all(query, values={"q": q, "skip": skip, "limit": limit})
 
-    result = {}
-    for record in records:
-        result.setdefault(record["company_id"], []).append(record[column])
-    return result
+    return [_build_company(record) for record in records]
 
 
-async def _fetch_reviews(company_ids: List[int]):
-    if not company_ids:
-        return {}
+def _json_column(value):
+    # asyncpg hands json/jsonb columns back as text unless a type codec is registered
+    return json.loads(value) if isinstance(value, str) else value
 
-    query = """
-        SELECT id, company_id, author, rating, text, date
-        FROM reviews
-        WHERE company_id = ANY(:company_ids)
-        ORDER BY company_id, created_at DESC
-    """
-    records = await database.fetch_all(query, values={"company_ids": company_ids})
-
-    result = {}
-    for record in records:
-        review = Review(
-            id=record["id"],
-            author=record["author"],
-            rating=record["rating"],
-            text=record["text"],
-            date=record["date"].strftime("%Y-%m-%d")
-        )
-        result.setdefault(record["company_id"], []).append(review)
-    return result
-
-
-def _build_company(company_record, tags_map, services_map, reviews_map):
-    company_id = company_record["id"]
-    return Company(
-        id=company_id,
-        name=company_record["name"],
-        category=company_record["category_id"],
-        description=company_record["description"],
-        rating=float(company_record["rating"]),
-        reviewsCount=company_record["reviews_count"],
-        verified=company_record["verified"],
-        inn=company_record["inn"],
-        region=company_record["region"],
-        yearFounded=company_record["year_founded"],
-        employees=company_record["employees"],
-        tags=tags_map.get(company_id, []),
-        logo=company_record["logo"],
-        phone=company_record["phone"],
-        email=company_record["email"],
-        website=company_record["website"],
-        completedDeals=company_record["completed_deals"],
-        responseTime=company_record["response_time"],
-        services=services_map.get(company_id, []),
-        reviews=reviews_map.get(company_id, [])
-    )
+
+def _build_company(company_record):
+    return CompanyCard.from_card(_json_column(company_record["card"]))
 
 # --- API Endpoints ---
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus metrics (aggregated across workers with PROMETHEUS_MULTIPROC_DIR)"""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return metrics_response()
+
 @app.post("/token", response_model=Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
     logger.info(f"🔐 Login attempt for username: {form_data.username}")
@@ -362,9 +316,9 @@ async def register_user(user: UserCreate):
         logger.warning(f"❌ Registration failed - username already exists: {user.username}")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username already registered")
     
+    hashed_password = await password_hasher.hash(user.password)
+
     try:
-        hashed_password = get_password_hash(user.password)
-        
         # Insert new user
         query = """
             INSERT INTO users (username, email, full_name, hashed_password, disabled)
@@ -388,26 +342,117 @@ async def register_user(user: UserCreate):
         logger.error(f"❌ Registration error for {user.username}: {str(e)}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Registration failed")
 
+# --- Response Caches ---
+# Serialized catalogue responses with ETags; cleared by the write endpoints
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "60"))
+company_response_cache = ResponseCache(ttl=RESPONSE_CACHE_TTL)
+category_response_cache = ResponseCache(ttl=RESPONSE_CACHE_TTL)
+
+# --- Autocomplete ---
+# Names, tags and services held in memory so typing never hits Postgres
+company_autocomplete = PrefixIndex()
+
+AUTOCOMPLETE_TERMS_QUERY = """
+    SELECT 'company' as kind, name as text, id as company_id FROM companies
+    UNION ALL
+    SELECT 'tag', tag, company_id FROM company_tags
+    UNION ALL
+    SELECT 'service', service, company_id FROM company_services
+"""
+
+async def load_autocomplete_index():
+    records = await database.fetch_all(AUTOCOMPLETE_TERMS_QUERY)
+    company_autocomplete.rebuild(
+        (record["kind"], record["text"], record["company_id"]) for record in records
+    )
+    logger.info(f"🔎 Autocomplete index loaded: {len(company_autocomplete)} terms")
+
 # --- API Endpoints ---
 @app.get("/companies/", response_model=List[Company])
-async def get_companies(skip: int = 0, limit: int = 10):
-    """Get list of companies with pagination"""
-    return await get_companies_from_db(skip, limit)
+async def get_companies(request: Request, skip: int = 0, limit: int = 10, after: Optional[str] = None):
+    """Get list of companies with pagination (offset via skip, or keyset via after cursor)"""
+    cached = company_response_cache.lookup(request)
+    if cached is not None:
+        return cached
+    after_id = decode_cursor(after, "id")["id"] if after else None
+    companies = await get_companies_from_db(skip, limit, after_id)
+    headers = {}
+    if companies and len(companies) == limit:
+        headers[NEXT_CURSOR_HEADER] = encode_cursor({"id": companies[-1].id})
+    return company_response_cache.store(request, companies, headers)
+
+@app.get("/companies/autocomplete")
+async def autocomplete_companies(q: str, limit: int = 10):
+    """Suggest company names, tags and services starting with q"""
+    return company_autocomplete.search(q, max(1, min(limit, 50)))
+
+@app.get("/companies/search", response_model=List[Company])
+async def search_companies(request: Request, q: str, skip: int = 0, limit: int = 10):
+    """Full-text search over company names, tags, services and descriptions, best matches first"""
+    if not q.strip():
+        return []
+    cached = company_response_cache.lookup(request)
+    if cached is not None:
+        return cached
+    companies = await search_companies_in_db(q, max(0, skip), max(1, min(limit, 50)))
+    return company_response_cache.store(request, companies)
 
 @app.get("/companies/{company_id}", response_model=Company)
-async def get_company(company_id: int):
+async def get_company(request: Request, company_id: int):
     """Get specific company by ID"""
+    cached = company_response_cache.lookup(request)
+    if cached is not None:
+        return cached
     company = await get_company_from_db(company_id)
     if company is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Company not found")
-    return company
+    return company_response_cache.store(request, company)
 
 @app.get("/categories/")
-async def get_categories():
+async def get_categories(request: Request):
     """Get list of available categories"""
+    cached = category_response_cache.lookup(request)
+    if cached is not None:
+        return cached
     query = "SELECT * FROM categories ORDER BY id"
     categories = await database.fetch_all(query)
-    return [{"id": cat["id"], "nameKey": cat["name_key"], "icon": cat["icon"]} for cat in categories]
+    return category_response_cache.store(
+        request,
+        [{"id": cat["id"], "nameKey": cat["name_key"], "icon": cat["icon"]} for cat in categories]
+    )
+
+# Company, services and tags in one statement: the child rows are expanded
+# from arrays, so the write is atomic and costs a single round-trip regardless
+# of how many tags/services there are. The company row is selected from the
+# owner's users row, so a missing owner inserts nothing and returns no id.
+CREATE_COMPANY_QUERY = """
+    WITH owner AS (
+        SELECT id FROM users WHERE username = :username
+    ),
+    new_company AS (
+        INSERT INTO companies (
+            name, category_id, description, inn, region, year_founded, 
+            employees, phone, email, website, created_by
+        )
+        SELECT :name, :category_id, :description, :inn, :region, CAST(:year_founded AS integer),
+               :employees, :phone, :email, :website, owner.id
+        FROM owner
+        RETURNING id
+    ),
+    new_services AS (
+        INSERT INTO company_services (company_id, service)
+        SELECT new_company.id, s.service
+        FROM new_company, unnest(CAST(:services AS text[])) WITH ORDINALITY AS s(service, position)
+        ORDER BY s.position
+    ),
+    new_tags AS (
+        INSERT INTO company_tags (company_id, tag)
+        SELECT new_company.id, t.tag
+        FROM new_company, unnest(CAST(:tags AS text[])) WITH ORDINALITY AS t(tag, position)
+        ORDER BY t.position
+    )
+    SELECT id FROM new_company
+"""
 
 @app.post("/companies/", response_model=Company)
 async def create_company(company_data: CompanyCreate, current_user: User = Depends(get_current_active_user)):
@@ -415,25 +460,8 @@ async def create_company(company_data: CompanyCreate, current_user: User = Depen
     logger.info(f"🏢 Company registration attempt: {company_data.name} by user {current_user.username}")
     
     try:
-        # Insert new company
-        company_query = """
-            INSERT INTO companies (
-                name, category_id, description, inn, region, year_founded, 
-                employees, phone, email, website, created_by
-            )
-            VALUES (
-                :name, :category_id, :description, :inn, :region, :year_founded,
-                :employees, :phone, :email, :website, :created_by
-            )
-            RETURNING id
-        """
-        
-        # Get user ID
-        user_query = "SELECT id FROM users WHERE username = :username"
-        user_record = await database.fetch_one(user_query, values={"username": current_user.username})
-        
-        company_record = await database.fetch_one(
-            company_query,
+        company_id = await database.fetch_val(
+            CREATE_COMPANY_QUERY,
             values={
                 "name": company_data.name,
                 "category_id": company_data.category,
@@ -445,35 +473,227 @@ async def create_company(company_data: CompanyCreate, current_user: User = Depen
                 "phone": company_data.phone,
                 "email": company_data.email,
                 "website": company_data.website,
-                "created_by": user_record["id"]
+                "username": current_user.username,
+                "services": company_data.services,
+                "tags": company_data.tags or []
             }
         )
-        
-        company_id = company_record["id"]
-        
-        # Insert services
-        for service in company_data.services:
-            await database.execute(
-                "INSERT INTO company_services (company_id, service) VALUES (:company_id, :service)",
-                values={"company_id": company_id, "service": service}
-            )
-        
-        # Insert tags
-        for tag in (company_data.tags or []):
-            await database.execute(
-                "INSERT INTO company_tags (company_id, tag) VALUES (:company_id, :tag)",
-                values={"company_id": company_id, "tag": tag}
+        if company_id is None:
+            # Token still valid (or user cached) but the account is gone
+            logger.warning(f"❌ Company creation rejected: user {current_user.username} no longer exists")
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Could not validate credentials",
+                headers={"WWW-Authenticate": "Bearer"},
             )
         
+        company_response_cache.clear()
+        company_autocomplete.add("company", company_data.name, company_id)
+        for term in company_data.services:
+            company_autocomplete.add("service", term, company_id)
+        for term in (company_data.tags or []):
+            company_autocomplete.add("tag", term, company_id)
         logger.info(f"✅ Company created successfully: {company_data.name} (ID: {company_id})")
         
         # Return the created company
-        return await get_company_from_db(company_id)
+        return FastJSONResponse(await get_company_from_db(company_id))
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Company creation error for {company_data.name}: {str(e)}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Company creation failed")
 
+# --- Bulk Import ---
+IMPORT_CHUNK_SIZE = 1000
+# Keeps the response bounded when a whole file is malformed
+IMPORT_MAX_REPORTED_ERRORS = 1000
+IMPORT_READ_BLOCK = 1024 * 1024
+
+COMPANY_COPY_COLUMNS = [
+    "id", "name", "category_id", "description", "inn", "region", "year_founded",
+    "employees", "phone", "email", "website", "created_by",
+]
+
+def _is_utf8(upload: UploadFile) -> bool:
+    """Check the whole upload decodes before any chunk is written, then rewind it"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        for block in iter(lambda: upload.file.read(IMPORT_READ_BLOCK), b""):
+            decoder.decode(block)
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        return False
+    finally:
+        upload.file.seek(0)
+    return True
+
+def _iter_import_rows(upload: UploadFile, file_format: str):
+    """Yield (row_number, dict or parse error) from an uploaded CSV/NDJSON file"""
+    text = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+    if file_format == "csv":
+        # services and tags are "|"-separated inside their CSV cells
+        reader = csv.DictReader(text)
+        for row in reader:
+            row.pop(None, None)  # cells beyond the header row
+            for key in ("services", "tags"):
+                row[key] = [value.strip() for value in (row.get(key) or "").split("|") if value.strip()]
+            yield reader.line_num, row
+    else:
+        for line_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except ValueError as e:
+                yield line_number, e
+
+def _read_import_chunk(rows, category_ids: set):
+    """Parse and validate the next chunk of rows; returns (valid, errors)"""
+    valid, errors = [], []
+    for row_number, row in islice(rows, IMPORT_CHUNK_SIZE):
+        if isinstance(row, Exception):
+            errors.append({"row": row_number, "errors": [f"Invalid JSON: {row}"]})
+            continue
+        try:
+            company = CompanyCreate(**row)
+        except (ValidationError, TypeError) as e:
+            messages = (
+                [f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()]
+                if isinstance(e, ValidationError) else [str(e)]
+            )
+            errors.append({"row": row_number, "errors": messages})
+            continue
+        if company.category not in category_ids:
+            errors.append({"row": row_number, "errors": [f"category: unknown category '{company.category}'"]})
+            continue
+        valid.append((row_number, company))
+    return valid, errors
+
+async def _copy_company_chunk(connection, chunk, created_by):
+    """COPY one chunk of validated companies with their services and tags in one transaction"""
+    async with connection.transaction():
+        id_records = await connection.fetch(
+            "SELECT nextval(pg_get_serial_sequence('companies', 'id')) as id FROM generate_series(1, $1)",
+            len(chunk)
+        )
+        company_ids = [record["id"] for record in id_records]
+        await connection.copy_records_to_table(
+            "companies",
+            columns=COMPANY_COPY_COLUMNS,
+            records=[
+                (company_id, c.name, c.category, c.description, c.inn, c.region, c.yearFounded,
+                 c.employees, c.phone, c.email, c.website, created_by)
+                for company_id, (_, c) in zip(company_ids, chunk)
+            ],
+        )
+        await connection.copy_records_to_table(
+            "company_services",
+            columns=["company_id", "service"],
+            records=[
+                (company_id, service)
+                for company_id, (_, c) in zip(company_ids, chunk)
+                for service in c.services
+            ],
+        )
+        await connection.copy_records_to_table(
+            "company_tags",
+            columns=["company_id", "tag"],
+            records=[
+                (company_id, tag)
+                for company_id, (_, c) in zip(company_ids, chunk)
+                for tag in (c.tags or [])
+            ],
+        )
+
+async def _insert_companies_one_by_one(chunk, username: str, errors: list) -> int:
+    """Fallback when a chunk's COPY fails: isolate the rows the database rejects"""
+    imported = 0
+    for row_number, company in chunk:
+        try:
+            company_id = await database.fetch_val(
+                CREATE_COMPANY_QUERY,
+                values={
+                    "name": company.name,
+                    "category_id": company.category,
+                    "description": company.description,
+                    "inn": company.inn,
+                    "region": company.region,
+                    "year_founded": company.yearFounded,
+                    "employees": company.employees,
+                    "phone": company.phone,
+                    "email": company.email,
+                    "website": company.website,
+                    "username": username,
+                    "services": company.services,
+                    "tags": company.tags or []
+                }
+            )
+        except Exception as e:
+            errors.append({"row": row_number, "errors": [str(e)]})
+            continue
+        if company_id is None:
+            errors.append({"row": row_number, "errors": [f"user {username} no longer exists"]})
+        else:
+            imported += 1
+    return imported
+
+def _keep_reported_errors(errors: list, new_errors: list):
+    """Keep at most IMPORT_MAX_REPORTED_ERRORS rows; later ones are only counted as failed"""
+    errors.extend(new_errors[:max(0, IMPORT_MAX_REPORTED_ERRORS - len(errors))])
+
+@app.post("/companies/import")
+async def import_companies(
+    file: UploadFile,
+    file_format: Optional[str] = None,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Bulk-load companies from a CSV or NDJSON upload (requires authentication)
+
+    Rows are validated against CompanyCreate and loaded in chunks with COPY;
+    invalid rows are reported back without aborting the rest of the file.
+    """
+    file_format = (file_format or ("csv" if (file.filename or "").endswith(".csv") else "ndjson")).lower()
+    if file_format not in ("csv", "ndjson"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="file_format must be csv or ndjson")
+    if not await run_in_threadpool(_is_utf8, file):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File must be UTF-8 encoded")
+    logger.info(f"📦 Company import ({file_format}) started by user {current_user.username}")
+
+    category_ids = {record["id"] for record in await database.fetch_all("SELECT id FROM categories")}
+    user_record = await database.fetch_one(
+        "SELECT id FROM users WHERE username = :username", values={"username": current_user.username}
+    )
+    rows = _iter_import_rows(file, file_format)
+    imported, failed, errors = 0, 0, []
+
+    async with database.connection() as connection:
+        while True:
+            # File reads and validation are blocking, so keep them off the event loop
+            chunk, chunk_errors = await run_in_threadpool(_read_import_chunk, rows, category_ids)
+            if not chunk and not chunk_errors:
+                break
+            failed += len(chunk_errors)
+            _keep_reported_errors(errors, chunk_errors)
+            if not chunk:
+                continue
+            try:
+                await _copy_company_chunk(profiled(connection.raw_connection), chunk, user_record["id"])
+                imported += len(chunk)
+            except Exception as e:
+                logger.warning(f"⚠️ Chunk COPY failed, retrying row by row: {e}")
+                chunk_errors = []
+                chunk_imported = await _insert_companies_one_by_one(chunk, current_user.username, chunk_errors)
+                imported += chunk_imported
+                failed += len(chunk_errors)
+                _keep_reported_errors(errors, chunk_errors)
+
+    if imported:
+        company_response_cache.clear()
+        await load_autocomplete_index()
+    logger.info(f"✅ Company import finished: {imported} imported, {failed} failed")
+    return {"imported": imported, "failed": failed, "errors": errors}
+
 @app.get('/')
 async def read_root():
     total_companies_query = "SELECT COUNT(*) as count FROM companies"
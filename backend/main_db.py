@@ -1,6 +1,9 @@
 from fastapi import FastAPI, Depends, HTTPException, status, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from fastapi.datastructures import Default
 import os
+import asyncio
 import logging
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from passlib.context import CryptContext
@@ -10,26 +13,75 @@ from typing import Optional, List
 from pydantic import BaseModel
 import asyncpg
 from contextlib import asynccontextmanager
+from hashing import PasswordHasher
+from cache import TTLCache
+from pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
+from view_counter import ViewCounterBuffer
+from response_cache import CachedResponse, respond_cached, serialize_json
+from structured_logging import configure_logging, RequestLoggingMiddleware, request_logging_options_from_env
+from json_response import FastJSONResponse, dumps as json_dumps
+from profiling import PROFILING_ENABLED, ProfilingMiddleware, ProfiledRoute
+from metrics import METRICS_ENABLED, MetricsMiddleware, mark_worker_stopped, metrics_response, track_query
+from pool import InstrumentedPool, pool_options_from_env, acquire_timeout_from_env
+from replica import ReplicaRouter
+from invalidation import InvalidationListener
+from export import stream_copy_csv, stream_parquet, parquet_available
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configure logging (queue-backed, LOG_LEVEL / LOG_FORMAT from env)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Database connection
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://user:password@db:5432/globex")
 db_pool = None
+# Pool sizing, statement cache and timeouts are tuned per environment (see env.example)
+DB_POOL_OPTIONS = pool_options_from_env()
+DB_POOL_TIMEOUT = acquire_timeout_from_env()
+
+# Optional streaming replica for GET handlers; reads fall back to the primary
+# while it is down or more than REPLICA_MAX_LAG seconds behind
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+REPLICA_MAX_LAG = float(os.getenv("REPLICA_MAX_LAG", "10"))
+REPLICA_CHECK_INTERVAL = float(os.getenv("REPLICA_CHECK_INTERVAL", "5"))
+# Short, so a hung replica costs a request this long before it falls back to the primary
+REPLICA_POOL_TIMEOUT = float(os.getenv("REPLICA_POOL_TIMEOUT", "1")) or None
+# Routes read-only queries; set in lifespan once db_pool is up
+read_db = None
+
+# Trigger-driven LISTEN/NOTIFY so every worker drops stale local cache entries
+cache_invalidation = InvalidationListener(DATABASE_URL)
+
+# Proposal views are buffered in memory and written in batches
+VIEW_COUNTER_FLUSH_INTERVAL = float(os.getenv("VIEW_COUNTER_FLUSH_INTERVAL", "5"))
+view_counter = ViewCounterBuffer(interval=VIEW_COUNTER_FLUSH_INTERVAL)
+
+# How often the trigger-maintained dashboard aggregates are recomputed from scratch
+DASHBOARD_RECONCILE_INTERVAL = float(os.getenv("DASHBOARD_RECONCILE_INTERVAL", "3600"))
+
+async def reconcile_dashboard_stats_periodically():
+    """Correct drift in dashboard_stats left by writes that bypass the triggers"""
+    while True:
+        await asyncio.sleep(DASHBOARD_RECONCILE_INTERVAL)
+        try:
+            async with db_pool.acquire() as connection:
+                await connection.execute("SELECT reconcile_dashboard_stats()")
+            logger.info("📊 Dashboard stats reconciled")
+        except Exception as e:
+            logger.error(f"❌ Dashboard stats reconciliation failed: {e}")
 
 # Lifespan manager for database connections
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global db_pool
+    global db_pool, read_db
+    password_hasher.start()
     # Startup - connect to database
     try:
-        db_pool = await asyncpg.create_pool(DATABASE_URL)
-        logger.info("🗄️ Database connected successfully")
+        db_pool = InstrumentedPool(
+            await asyncpg.create_pool(DATABASE_URL, **DB_POOL_OPTIONS),
+            acquire_timeout=DB_POOL_TIMEOUT,
+        )
+        logger.info(f"🗄️ Database connected successfully "
+                    f"(pool {DB_POOL_OPTIONS['min_size']}-{DB_POOL_OPTIONS['max_size']} connections)")
         
         # Verify admin user exists
         async with db_pool.acquire() as connection:
@@ -46,14 +98,58 @@ async def lifespan(app: FastAPI):
         # Fall back to simple mode without database
         db_pool = None
     
+    replica_pool = None
+    if db_pool and DATABASE_REPLICA_URL:
+        try:
+            replica_pool = InstrumentedPool(
+                await asyncpg.create_pool(DATABASE_REPLICA_URL, **DB_POOL_OPTIONS),
+                acquire_timeout=REPLICA_POOL_TIMEOUT,
+                name="replica",
+            )
+            logger.info("🗄️ Read replica connected successfully")
+        except Exception as e:
+            logger.warning(f"⚠️ Read replica connection failed, reading from primary: {e}")
+    
+    reconcile_task = None
+    if db_pool:
+        read_db = ReplicaRouter(db_pool, replica_pool, max_lag=REPLICA_MAX_LAG,
+                                check_interval=REPLICA_CHECK_INTERVAL)
+        read_db.start()
+        await cache_invalidation.start()
+        try:
+            await reload_categories_snapshot()
+        except Exception as e:
+            logger.error(f"❌ Failed to load categories snapshot: {e}")
+        view_counter.start(db_pool)
+        reconcile_task = asyncio.create_task(reconcile_dashboard_stats_periodically())
+    
     yield
     
+    password_hasher.shutdown()
+    mark_worker_stopped()
+    if reconcile_task:
+        reconcile_task.cancel()
+        try:
+            await reconcile_task
+        except asyncio.CancelledError:
+            pass
     # Shutdown - close database connections
     if db_pool:
+        # Write out views buffered since the last flush
+        await view_counter.stop()
+        await read_db.stop()
+        await cache_invalidation.stop()
+        if replica_pool:
+            await replica_pool.close()
         await db_pool.close()
         logger.info("🗄️ Database disconnected")
 
-app = FastAPI(lifespan=lifespan)
+# orjson for every JSON response. Wrapped in Default() so routes with a
+# response_model keep FastAPI's pydantic dump_json fast path
+app = FastAPI(lifespan=lifespan, default_response_class=Default(FastJSONResponse))
+if PROFILING_ENABLED:
+    # Must be set before any route is declared
+    app.router.route_class = ProfiledRoute
 
 # Add CORS middleware
 app.add_middleware(
@@ -71,29 +167,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Add request logging middleware
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    start_time = datetime.now()
-    
-    # Log request
-    logger.info(f"🔵 REQUEST: {request.method} {request.url}")
-    if request.method in ["POST", "PUT", "PATCH"]:
-        try:
-            body = await request.body()
-            if body:
-                logger.info(f"🔵 Body: {body.decode('utf-8')[:200]}...")
-        except Exception as e:
-            logger.error(f"❌ Error reading request body: {e}")
-    
-    # Process request
-    response = await call_next(request)
-    
-    # Log response
-    process_time = datetime.now() - start_time
-    logger.info(f"🟢 RESPONSE: {response.status_code} - {process_time.total_seconds():.3f}s")
-    
-    return response
+# Structured access log, sampled per route (see env.example)
+app.add_middleware(RequestLoggingMiddleware, **request_logging_options_from_env())
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+# Opt-in (PROFILE_REQUESTS=true): Server-Timing header and per-request query log
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
 
 # --- Configuration ---
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key")
@@ -109,6 +189,9 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+# Async entry point used by request handlers; keeps bcrypt off the event loop
+password_hasher = PasswordHasher(pwd_context)
+
 # --- JWT Token Handling ---
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
@@ -128,6 +211,12 @@ class User(BaseModel):
 class UserInDB(User):
     hashed_password: str
 
+class UserCreate(BaseModel):
+    username: str
+    email: Optional[str] = None
+    full_name: Optional[str] = None
+    password: str
+
 # === Модели данных ===
 
 class Company(BaseModel):
@@ -209,10 +298,11 @@ async def get_user_from_db(username: str):
     if db_pool:
         try:
             async with db_pool.acquire() as connection:
-                row = await connection.fetchrow(
-                    "SELECT username, email, full_name, hashed_password, is_active FROM users WHERE username = $1",
-                    username
-                )
+                with track_query("get_user"):
+                    row = await connection.fetchrow(
+                        "SELECT username, email, full_name, hashed_password, is_active FROM users WHERE username = $1",
+                        username
+                    )
                 if row:
                     return UserInDB(
                         username=row['username'],
@@ -231,13 +321,40 @@ async def get_user_from_db(username: str):
     
     return None
 
+# Authenticated users keyed by username, so a valid JWT costs no DB round-trip
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+def invalidate_cached_user(username: Optional[str] = None):
+    """Drop cached user data after the user is updated or disabled (all users if None)"""
+    if username is None:
+        user_cache.clear()
+    else:
+        user_cache.invalidate(username)
+
+cache_invalidation.register("users", invalidate_cached_user)
+
+async def get_cached_user(username: str, token_expires_at: Optional[float] = None):
+    """get_user_from_db behind user_cache; entries never outlive the token"""
+    user = user_cache.get(username)
+    if user is not None:
+        return user
+    user = await get_user_from_db(username)
+    if user is not None:
+        ttl = None
+        if token_expires_at is not None:
+            ttl = token_expires_at - datetime.now(UTC).timestamp()
+        user_cache.set(username, user, ttl=ttl)
+    return user
+
 async def authenticate_user(username: str, password: str):
     logger.info(f"🔐 Authenticating user: {username}")
     user = await get_user_from_db(username)
     if not user:
         logger.warning(f"❌ User not found: {username}")
         return False
-    if not verify_password(password, user.hashed_password):
+    if not await password_hasher.verify(password, user.hashed_password):
         logger.warning(f"❌ Invalid password for user: {username}")
         return False
     logger.info(f"✅ User authenticated successfully: {username}")
@@ -267,7 +384,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
-    user = await get_user_from_db(username=token_data.username)
+    user = await get_cached_user(token_data.username, payload.get("exp"))
     if user is None:
         raise credentials_exception
     return user
@@ -277,6 +394,14 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
+# Maintenance endpoints are limited to the built-in administrator account
+ADMIN_USERNAME = os.getenv("ADMIN_USERNAME", "admin")
+
+async def get_current_admin_user(current_user: User = Depends(get_current_active_user)):
+    if current_user.username != ADMIN_USERNAME:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin privileges required")
+    return current_user
+
 # --- API Endpoints ---
 
 @app.get("/")
@@ -288,6 +413,20 @@ async def read_root():
         "database": db_status
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus metrics (aggregated across workers with PROMETHEUS_MULTIPROC_DIR)"""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return metrics_response()
+
+@app.get("/health/pool")
+async def get_pool_stats():
+    """Состояние пулов соединений (основной и реплика): размер, занятые, ожидание acquire() и таймауты"""
+    if not db_pool:
+        return {"database": "mock_mode"}
+    return {**db_pool.stats(), "replica": read_db.stats()}
+
 @app.post("/token", response_model=Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
     logger.info(f"🔐 Login attempt for username: {form_data.username}")
@@ -313,6 +452,37 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
 async def read_users_me(current_user: User = Depends(get_current_active_user)):
     return current_user
 
+@app.post("/register/", response_model=User)
+async def register_user(user: UserCreate):
+    logger.info(f"👤 Registration attempt for username: {user.username}")
+    
+    existing_user = await get_user_from_db(user.username)
+    if existing_user:
+        logger.warning(f"❌ Registration failed - username already exists: {user.username}")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username already registered")
+    
+    if not db_pool:
+        raise HTTPException(status_code=503, detail="Registration is unavailable in mock mode")
+    
+    hashed_password = await password_hasher.hash(user.password)
+    
+    try:
+        async with db_pool.acquire() as connection:
+            with track_query("register_user"):
+                row = await connection.fetchrow(
+                    """INSERT INTO users (username, email, full_name, hashed_password, disabled)
+                       VALUES ($1, $2, $3, $4, FALSE)
+                       RETURNING username, email, full_name, disabled""",
+                    user.username, user.email, user.full_name, hashed_password
+                )
+        
+        invalidate_cached_user(user.username)
+        logger.info(f"✅ Registration successful for username: {user.username}")
+        return User(**dict(row))
+    except Exception as e:
+        logger.error(f"❌ Registration error for {user.username}: {e}")
+        raise HTTPException(status_code=500, detail="Registration failed")
+
 @app.post("/companies/")
 async def create_company(
     company: Company, 
@@ -325,21 +495,24 @@ async def create_company(
         try:
             async with db_pool.acquire() as connection:
                 # Get user ID
-                user_row = await connection.fetchrow(
-                    "SELECT id FROM users WHERE username = $1", current_user.username
-                )
+                with track_query("get_user_id"):
+                    user_row = await connection.fetchrow(
+                        "SELECT id FROM users WHERE username = $1", current_user.username
+                    )
                 user_id = user_row['id'] if user_row else 1
                 
                 # Insert company
-                company_id = await connection.fetchval(
-                    """INSERT INTO companies (name, inn, category, description, region, city, address, website, email, phone, created_by)
-                       VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11)
-                       RETURNING id""",
-                    company.name, company.inn, company.category, company.description,
-                    company.region, company.city, company.address, company.website,
-                    company.email, company.phone, user_id
-                )
+                with track_query("create_company"):
+                    company_id = await connection.fetchval(
+                        """INSERT INTO companies (name, inn, category, description, region, city, address, website, email, phone, created_by)
+                           VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11)
+                           RETURNING id""",
+                        company.name, company.inn, company.category, company.description,
+                        company.region, company.city, company.address, company.website,
+                        company.email, company.phone, user_id
+                    )
                 
+                invalidate_facets("companies")
                 logger.info(f"✅ Company created in database with ID: {company_id}")
                 return {"message": "Company created successfully", "company_id": company_id}
                 
@@ -356,25 +529,85 @@ async def create_company(
     logger.info(f"✅ Company created (mock mode): {company.name}")
     return {"message": "Company created successfully (mock mode)", "company": company_data}
 
+# Page size limits for the non-streaming company listing
+COMPANIES_PAGE_LIMIT = 100
+COMPANIES_MAX_LIMIT = 1000
+# Rows fetched per server-side cursor round-trip when streaming
+COMPANIES_STREAM_BATCH = 500
+
+def _build_companies_query(name: Optional[str], region: Optional[str], fuzzy: bool):
+    """Company listing SQL with optional name/region filters.
+
+    Substring filters use ILIKE, fuzzy mode uses the pg_trgm % operator and
+    ranks by similarity; both are served by the trigram GIN indexes.
+    """
+    conditions, params, ranks = [], [], []
+    for column, value in (("c.name", name), ("c.region", region)):
+        if not value:
+            continue
+        params.append(value if fuzzy else f"%{value}%")
+        if fuzzy:
+            conditions.append(f"{column} % ${len(params)}")
+            ranks.append(f"similarity({column}, ${len(params)})")
+        else:
+            conditions.append(f"{column} ILIKE ${len(params)}")
+    
+    where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    rank_order = f"{' + '.join(ranks)} DESC, " if ranks else ""
+    query = f"""SELECT c.*, u.username as created_by_username 
+                FROM companies c 
+                LEFT JOIN users u ON c.created_by = u.id 
+                {where_clause}
+                ORDER BY {rank_order}c.created_at DESC"""
+    return query, params
+
+async def _stream_companies(query: str, params: list):
+    """Yield companies as NDJSON, one chunk per batch read from a server-side cursor"""
+    try:
+        async with read_db.acquire() as connection:
+            # Server-side cursors only live inside a transaction
+            async with connection.transaction():
+                cursor = await connection.cursor(query, *params)
+                streamed = 0
+                while True:
+                    rows = await cursor.fetch(COMPANIES_STREAM_BATCH)
+                    if not rows:
+                        break
+                    streamed += len(rows)
+                    yield b"".join(json_dumps(row) + b"\n" for row in rows)
+        logger.info(f"📊 Streamed {streamed} companies from database")
+    except Exception as e:
+        # Headers are already sent, so the client only sees a truncated stream
+        logger.error(f"❌ Database error streaming companies: {e}")
+        raise
+
 @app.get("/companies/")
-async def list_companies():
-    """List all companies"""
+async def list_companies(
+    limit: int = COMPANIES_PAGE_LIMIT,
+    offset: int = 0,
+    stream: bool = False,
+    name: Optional[str] = None,
+    region: Optional[str] = None,
+    fuzzy: bool = False
+):
+    """List companies: one page as a JSON array, or everything as NDJSON with stream=true"""
+    query, params = _build_companies_query(name, region, fuzzy)
+    if db_pool and stream:
+        return StreamingResponse(_stream_companies(query, params), media_type="application/x-ndjson")
+    
+    limit = max(1, min(limit, COMPANIES_MAX_LIMIT))
+    offset = max(0, offset)
     if db_pool:
         try:
-            async with db_pool.acquire() as connection:
-                rows = await connection.fetch(
-                    """SELECT c.*, u.username as created_by_username 
-                       FROM companies c 
-                       LEFT JOIN users u ON c.created_by = u.id 
-                       ORDER BY c.created_at DESC"""
-                )
-                companies = []
-                for row in rows:
-                    company_dict = dict(row)
-                    companies.append(company_dict)
-                
-                logger.info(f"📊 Retrieved {len(companies)} companies from database")
-                return companies
+            async with read_db.acquire() as connection:
+                with track_query("list_companies"):
+                    rows = await connection.fetch(
+                        f"{query} LIMIT ${len(params) + 1} OFFSET ${len(params) + 2}",
+                        *params, limit, offset
+                    )
+                logger.info(f"📊 Retrieved {len(rows)} companies from database")
+                # Records go straight to orjson, no dict copies or jsonable_encoder
+                return FastJSONResponse(rows)
                 
         except Exception as e:
             logger.error(f"❌ Database error listing companies: {e}")
@@ -383,24 +616,166 @@ async def list_companies():
     # Mock response
     return []
 
+# === Фасеты фильтров ===
+# Счетчики для чипов фильтров считаются одним запросом с GROUPING SETS
+# и кешируются до следующей записи в соответствующую таблицу
+FACETS_CACHE_TTL = float(os.getenv("FACETS_CACHE_TTL", "300"))
+facets_cache = TTLCache(maxsize=2, ttl=FACETS_CACHE_TTL)
+# Bumped per invalidation so a load that read pre-write counts never stores them
+facets_generation = {"companies": 0, "investment_proposals": 0}
+
+def invalidate_facets(key: str):
+    facets_generation[key] += 1
+    facets_cache.invalidate(key)
+
+cache_invalidation.register("companies", lambda key: invalidate_facets("companies"))
+cache_invalidation.register("investment_proposals", lambda key: invalidate_facets("investment_proposals"))
+
+COMPANY_FACETS_QUERY = """
+    SELECT CASE
+               WHEN GROUPING(category_id) = 0 THEN 'category_id'
+               WHEN GROUPING(region) = 0 THEN 'region'
+               ELSE 'verified'
+           END as facet,
+           COALESCE(category_id, region, verified::text) as value,
+           COUNT(*) as count
+    FROM companies
+    GROUP BY GROUPING SETS ((category_id), (region), (verified))
+    ORDER BY facet, count DESC, value
+"""
+
+PROPOSAL_FACETS_QUERY = """
+    SELECT CASE
+               WHEN GROUPING(industry) = 0 THEN 'industry'
+               WHEN GROUPING(business_stage) = 0 THEN 'business_stage'
+               ELSE 'investment_type'
+           END as facet,
+           COALESCE(industry, business_stage, investment_type) as value,
+           COUNT(*) as count
+    FROM investment_proposals
+    WHERE status = 'active'
+    GROUP BY GROUPING SETS ((industry), (business_stage), (investment_type))
+    ORDER BY facet, count DESC, value
+"""
+
+async def _load_facets(key: str, query: str, facet_names: List[str]):
+    """Return {facet: [{"value": ..., "count": ...}]} from cache or one grouped query"""
+    facets = facets_cache.get(key)
+    if facets is not None:
+        return facets
+    facets = {name: [] for name in facet_names}
+    if not db_pool:
+        return facets
+    generation = facets_generation[key]
+    try:
+        # From the primary: a lagging replica would refill the cache right after an
+        # invalidation with pre-write counts and keep them for FACETS_CACHE_TTL
+        async with db_pool.acquire() as connection:
+            with track_query(f"facets_{key}"):
+                rows = await connection.fetch(query)
+    except Exception as e:
+        logger.error(f"❌ Database error loading {key} facets: {e}")
+        raise HTTPException(status_code=500, detail="Database error loading facets")
+    for row in rows:
+        facets[row['facet']].append({"value": row['value'], "count": row['count']})
+    if generation == facets_generation[key]:
+        facets_cache.set(key, facets)
+    return facets
+
+@app.get("/companies/facets")
+async def get_company_facets():
+    """Количество компаний по категориям, регионам и статусу верификации"""
+    return await _load_facets("companies", COMPANY_FACETS_QUERY, ["category_id", "region", "verified"])
+
+@app.get("/investment-proposals/facets")
+async def get_investment_proposal_facets():
+    """Количество активных предложений по отраслям, стадиям и типам инвестиций"""
+    return await _load_facets(
+        "investment_proposals", PROPOSAL_FACETS_QUERY, ["industry", "business_stage", "investment_type"]
+    )
+
 # === API Endpoints ===
 
+# === Категории ===
+# Справочник категорий почти не меняется: он загружается один раз при старте в
+# неизменяемый снимок (готовые байты + ETag) и перечитывается по уведомлению
+# из триггера categories или через /admin/categories/reload
+CATEGORIES_QUERY = "SELECT id, name_key, icon FROM categories ORDER BY id"
+CATEGORIES_MAX_AGE = int(os.getenv("CATEGORIES_MAX_AGE", "86400"))
+CATEGORIES_CACHE_CONTROL = f"public, max-age={CATEGORIES_MAX_AGE}"
+# Mock categories must not stick in browser and proxy caches for a day
+MOCK_CATEGORIES_CACHE_CONTROL = "no-cache"
+
+# Used until the database snapshot loads, and in mock mode
+MOCK_CATEGORIES = [
+    {"id": "all", "nameKey": "Все категории", "icon": "📋"},
+    {"id": "it", "nameKey": "IT и разработка", "icon": "💻"},
+    {"id": "manufacturing", "nameKey": "Производство", "icon": "🏭"},
+    {"id": "logistics", "nameKey": "Логистика", "icon": "🚛"},
+    {"id": "construction", "nameKey": "Строительство", "icon": "🏗️"},
+    {"id": "consulting", "nameKey": "Консалтинг", "icon": "⚖️"},
+    {"id": "retail", "nameKey": "Розничная торговля", "icon": "🛒"},
+    {"id": "healthcare", "nameKey": "Здравоохранение", "icon": "🏥"},
+    {"id": "education", "nameKey": "Образование", "icon": "🎓"},
+    {"id": "finance", "nameKey": "Финансы", "icon": "💰"},
+]
+
+categories_snapshot = CachedResponse(serialize_json(MOCK_CATEGORIES))
+# Switched to CATEGORIES_CACHE_CONTROL once a database snapshot has loaded
+categories_cache_control = MOCK_CATEGORIES_CACHE_CONTROL
+# Bumped per reload so a slow, older reload never replaces a newer snapshot
+categories_generation = 0
+categories_reload_tasks = set()
+
+async def reload_categories_snapshot():
+    """Re-read categories from the primary and atomically swap the snapshot"""
+    global categories_snapshot, categories_cache_control, categories_generation
+    categories_generation += 1
+    generation = categories_generation
+    async with db_pool.acquire() as connection:
+        with track_query("load_categories"):
+            rows = await connection.fetch(CATEGORIES_QUERY)
+    if generation != categories_generation:
+        return categories_snapshot
+    categories_snapshot = CachedResponse(serialize_json(
+        [{"id": row["id"], "nameKey": row["name_key"], "icon": row["icon"]} for row in rows]
+    ))
+    categories_cache_control = CATEGORIES_CACHE_CONTROL
+    logger.info(f"📋 Categories snapshot loaded: {len(rows)} categories")
+    return categories_snapshot
+
+async def _reload_categories_logged():
+    try:
+        await reload_categories_snapshot()
+    except Exception as e:
+        logger.error(f"❌ Failed to reload categories snapshot: {e}")
+
+def schedule_categories_reload(key: Optional[str] = None):
+    """Invalidation handler: reload in the background, keep serving the old snapshot"""
+    if not db_pool:
+        return
+    task = asyncio.create_task(_reload_categories_logged())
+    categories_reload_tasks.add(task)
+    task.add_done_callback(categories_reload_tasks.discard)
+
+cache_invalidation.register("categories", schedule_categories_reload)
+
 @app.get("/categories/")
-async def list_categories():
+async def list_categories(request: Request):
     """Получить список всех категорий бизнеса"""
-    categories = [
-        {"id": "all", "nameKey": "Все категории", "icon": "📋"},
-        {"id": "it", "nameKey": "IT и разработка", "icon": "💻"},
-        {"id": "manufacturing", "nameKey": "Производство", "icon": "🏭"},
-        {"id": "logistics", "nameKey": "Логистика", "icon": "🚛"},
-        {"id": "construction", "nameKey": "Строительство", "icon": "🏗️"},
-        {"id": "consulting", "nameKey": "Консалтинг", "icon": "⚖️"},
-        {"id": "retail", "nameKey": "Розничная торговля", "icon": "🛒"},
-        {"id": "healthcare", "nameKey": "Здравоохранение", "icon": "🏥"},
-        {"id": "education", "nameKey": "Образование", "icon": "🎓"},
-        {"id": "finance", "nameKey": "Финансы", "icon": "💰"},
-    ]
-    return categories
+    return respond_cached(request, categories_snapshot, categories_cache_control)
+
+@app.post("/admin/categories/reload")
+async def reload_categories(current_user: User = Depends(get_current_admin_user)):
+    """Перечитать справочник категорий из базы (только администратор)"""
+    if not db_pool:
+        raise HTTPException(status_code=503, detail="Database is not connected")
+    try:
+        snapshot = await reload_categories_snapshot()
+    except Exception as e:
+        logger.error(f"❌ Database error reloading categories: {e}")
+        raise HTTPException(status_code=500, detail="Database error reloading categories")
+    return {"message": "Categories reloaded", "etag": snapshot.etag}
 
 @app.post("/investment-proposals/")
 async def create_investment_proposal(
@@ -414,29 +789,32 @@ async def create_investment_proposal(
         try:
             async with db_pool.acquire() as connection:
                 # Проверяем, что компания принадлежит пользователю
-                company_check = await connection.fetchrow(
-                    "SELECT id FROM companies WHERE id = $1", proposal.company_id
-                )
+                with track_query("check_company"):
+                    company_check = await connection.fetchrow(
+                        "SELECT id FROM companies WHERE id = $1", proposal.company_id
+                    )
                 if not company_check:
                     raise HTTPException(status_code=404, detail="Company not found")
                 
                 # Вставляем предложение
-                proposal_id = await connection.fetchval(
-                    """INSERT INTO investment_proposals 
-                       (company_id, title, description, investment_amount, equity_percentage, 
-                        expected_return, investment_type, business_stage, industry, location,
-                        min_investment, max_investment, funding_deadline, use_of_funds,
-                        financial_highlights, team_info, market_opportunity, competitive_advantages, risks)
-                       VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17, $18, $19)
-                       RETURNING id""",
-                    proposal.company_id, proposal.title, proposal.description, proposal.investment_amount,
-                    proposal.equity_percentage, proposal.expected_return, proposal.investment_type,
-                    proposal.business_stage, proposal.industry, proposal.location,
-                    proposal.min_investment, proposal.max_investment, proposal.funding_deadline,
-                    proposal.use_of_funds, proposal.financial_highlights, proposal.team_info,
-                    proposal.market_opportunity, proposal.competitive_advantages, proposal.risks
-                )
+                with track_query("create_investment_proposal"):
+                    proposal_id = await connection.fetchval(
+                        """INSERT INTO investment_proposals 
+                           (company_id, title, description, investment_amount, equity_percentage, 
+                            expected_return, investment_type, business_stage, industry, location,
+                            min_investment, max_investment, funding_deadline, use_of_funds,
+                            financial_highlights, team_info, market_opportunity, competitive_advantages, risks)
+                           VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17, $18, $19)
+                           RETURNING id""",
+                        proposal.company_id, proposal.title, proposal.description, proposal.investment_amount,
+                        proposal.equity_percentage, proposal.expected_return, proposal.investment_type,
+                        proposal.business_stage, proposal.industry, proposal.location,
+                        proposal.min_investment, proposal.max_investment, proposal.funding_deadline,
+                        proposal.use_of_funds, proposal.financial_highlights, proposal.team_info,
+                        proposal.market_opportunity, proposal.competitive_advantages, proposal.risks
+                    )
                 
+                invalidate_facets("investment_proposals")
                 logger.info(f"✅ Investment proposal created with ID: {proposal_id}")
                 return {"message": "Investment proposal created successfully", "proposal_id": proposal_id}
                 
@@ -454,15 +832,24 @@ async def list_investment_proposals(
     min_amount: Optional[float] = None,
     max_amount: Optional[float] = None,
     location: Optional[str] = None,
+    fuzzy: bool = False,
     limit: int = 50,
-    offset: int = 0
+    offset: int = 0,
+    after: Optional[str] = None
 ):
     """Получить список инвестиционных предложений с фильтрацией"""
+    # Курсор (after) включает keyset-пагинацию по (created_at, id) вместо OFFSET
+    cursor = decode_cursor(after, "created_at", "id") if after else None
+    # fuzzy=true: location ищется по триграммам с учетом опечаток и сортируется по схожести
+    fuzzy_location = fuzzy and bool(location)
+    if cursor and fuzzy_location:
+        raise HTTPException(status_code=400, detail="Cursor pagination is not supported with fuzzy matching")
     if db_pool:
         try:
-            async with db_pool.acquire() as connection:
+            async with read_db.acquire() as connection:
                 # Построение SQL запроса с фильтрами
                 where_conditions = ["status = 'active'"]
+                order_by = "ip.created_at DESC, ip.id DESC"
                 params = []
                 param_count = 0
                 
@@ -491,11 +878,23 @@ async def list_investment_proposals(
                     where_conditions.append(f"investment_amount <= ${param_count}")
                     params.append(max_amount)
                 
-                if location:
+                if fuzzy_location:
+                    param_count += 1
+                    where_conditions.append(f"location % ${param_count}")
+                    params.append(location)
+                    order_by = f"similarity(location, ${param_count}) DESC, {order_by}"
+                elif location:
                     param_count += 1
                     where_conditions.append(f"location ILIKE ${param_count}")
                     params.append(f"%{location}%")
                 
+                if cursor:
+                    where_conditions.append(
+                        f"(ip.created_at, ip.id) < (${param_count + 1}, ${param_count + 2})"
+                    )
+                    params.extend([cursor["created_at"], cursor["id"]])
+                    param_count += 2
+                
                 # Добавляем limit и offset
                 param_count += 1
                 limit_param = f"${param_count}"
@@ -503,7 +902,7 @@ async def list_investment_proposals(
                 
                 param_count += 1
                 offset_param = f"${param_count}"
-                params.append(offset)
+                params.append(0 if cursor else offset)
                 
                 where_clause = " AND ".join(where_conditions)
                 
@@ -512,15 +911,21 @@ async def list_investment_proposals(
                     FROM investment_proposals ip
                     JOIN companies c ON ip.company_id = c.id
                     WHERE {where_clause}
-                    ORDER BY ip.created_at DESC
+                    ORDER BY {order_by}
                     LIMIT {limit_param} OFFSET {offset_param}
                 """
                 
-                rows = await connection.fetch(query, *params)
-                proposals = [dict(row) for row in rows]
+                with track_query("list_investment_proposals"):
+                    rows = await connection.fetch(query, *params)
+                headers = {}
+                if rows and len(rows) == limit and not fuzzy_location:
+                    last = rows[-1]
+                    headers[NEXT_CURSOR_HEADER] = encode_cursor(
+                        {"created_at": last["created_at"], "id": last["id"]}
+                    )
                 
-                logger.info(f"📈 Retrieved {len(proposals)} investment proposals")
-                return proposals
+                logger.info(f"📈 Retrieved {len(rows)} investment proposals")
+                return FastJSONResponse(rows, headers=headers)
                 
         except Exception as e:
             logger.error(f"❌ Database error listing proposals: {e}")
@@ -534,27 +939,26 @@ async def get_investment_proposal(proposal_id: int):
     """Получить детальную информацию о предложении"""
     if db_pool:
         try:
-            async with db_pool.acquire() as connection:
-                # Увеличиваем счетчик просмотров
-                await connection.execute(
-                    "UPDATE investment_proposals SET views_count = views_count + 1 WHERE id = $1",
-                    proposal_id
-                )
-                
+            async with read_db.acquire() as connection:
                 # Получаем данные предложения
-                row = await connection.fetchrow(
-                    """SELECT ip.*, c.name as company_name, c.website as company_website,
-                              c.description as company_description, c.city as company_city
-                       FROM investment_proposals ip
-                       JOIN companies c ON ip.company_id = c.id
-                       WHERE ip.id = $1""",
-                    proposal_id
-                )
+                with track_query("get_investment_proposal"):
+                    row = await connection.fetchrow(
+                        """SELECT ip.*, c.name as company_name, c.website as company_website,
+                                  c.description as company_description, c.city as company_city
+                           FROM investment_proposals ip
+                           JOIN companies c ON ip.company_id = c.id
+                           WHERE ip.id = $1""",
+                        proposal_id
+                    )
                 
                 if not row:
                     raise HTTPException(status_code=404, detail="Investment proposal not found")
                 
-                return dict(row)
+                # Просмотр копится в буфере и записывается пакетом (см. view_counter)
+                view_counter.increment(proposal_id)
+                proposal = dict(row)
+                proposal["views_count"] += view_counter.pending(proposal_id)
+                return FastJSONResponse(proposal)
                 
         except Exception as e:
             logger.error(f"❌ Database error getting proposal: {e}")
@@ -571,27 +975,30 @@ async def create_investor_interest(interest: InvestorInterest):
         try:
             async with db_pool.acquire() as connection:
                 # Проверяем существование предложения
-                proposal_check = await connection.fetchrow(
-                    "SELECT id FROM investment_proposals WHERE id = $1", interest.proposal_id
-                )
+                with track_query("check_proposal"):
+                    proposal_check = await connection.fetchrow(
+                        "SELECT id FROM investment_proposals WHERE id = $1", interest.proposal_id
+                    )
                 if not proposal_check:
                     raise HTTPException(status_code=404, detail="Investment proposal not found")
                 
                 # Сохраняем заявку инвестора
-                interest_id = await connection.fetchval(
-                    """INSERT INTO investor_interests 
-                       (proposal_id, investor_name, investor_email, investor_phone, investment_amount, message)
-                       VALUES ($1, $2, $3, $4, $5, $6)
-                       RETURNING id""",
-                    interest.proposal_id, interest.investor_name, interest.investor_email,
-                    interest.investor_phone, interest.investment_amount, interest.message
-                )
+                with track_query("create_investor_interest"):
+                    interest_id = await connection.fetchval(
+                        """INSERT INTO investor_interests 
+                           (proposal_id, investor_name, investor_email, investor_phone, investment_amount, message)
+                           VALUES ($1, $2, $3, $4, $5, $6)
+                           RETURNING id""",
+                        interest.proposal_id, interest.investor_name, interest.investor_email,
+                        interest.investor_phone, interest.investment_amount, interest.message
+                    )
                 
                 # Увеличиваем счетчик заинтересованных инвесторов
-                await connection.execute(
-                    "UPDATE investment_proposals SET interested_investors = interested_investors + 1 WHERE id = $1",
-                    interest.proposal_id
-                )
+                with track_query("increment_interested_investors"):
+                    await connection.execute(
+                        "UPDATE investment_proposals SET interested_investors = interested_investors + 1 WHERE id = $1",
+                        interest.proposal_id
+                    )
                 
                 logger.info(f"✅ Investor interest created with ID: {interest_id}")
                 return {"message": "Interest registered successfully", "interest_id": interest_id}
@@ -607,14 +1014,15 @@ async def get_company_metrics(company_id: int):
     """Получить бизнес-метрики компании"""
     if db_pool:
         try:
-            async with db_pool.acquire() as connection:
-                rows = await connection.fetch(
-                    """SELECT * FROM business_metrics 
-                       WHERE company_id = $1 
-                       ORDER BY year DESC, month DESC""",
-                    company_id
-                )
-                return [dict(row) for row in rows]
+            async with read_db.acquire() as connection:
+                with track_query("get_company_metrics"):
+                    rows = await connection.fetch(
+                        """SELECT * FROM business_metrics 
+                           WHERE company_id = $1 
+                           ORDER BY year DESC, month DESC""",
+                        company_id
+                    )
+                return FastJSONResponse(rows)
                 
         except Exception as e:
             logger.error(f"❌ Database error getting metrics: {e}")
@@ -633,20 +1041,22 @@ async def create_business_metrics(
         try:
             async with db_pool.acquire() as connection:
                 # Проверяем права на компанию
-                company_check = await connection.fetchrow(
-                    "SELECT id FROM companies WHERE id = $1", company_id
-                )
+                with track_query("check_company"):
+                    company_check = await connection.fetchrow(
+                        "SELECT id FROM companies WHERE id = $1", company_id
+                    )
                 if not company_check:
                     raise HTTPException(status_code=404, detail="Company not found")
                 
-                metrics_id = await connection.fetchval(
-                    """INSERT INTO business_metrics 
-                       (company_id, revenue, profit, employees_count, year, month)
-                       VALUES ($1, $2, $3, $4, $5, $6)
-                       RETURNING id""",
-                    company_id, metrics.revenue, metrics.profit, 
-                    metrics.employees_count, metrics.year, metrics.month
-                )
+                with track_query("create_business_metrics"):
+                    metrics_id = await connection.fetchval(
+                        """INSERT INTO business_metrics 
+                           (company_id, revenue, profit, employees_count, year, month)
+                           VALUES ($1, $2, $3, $4, $5, $6)
+                           RETURNING id""",
+                        company_id, metrics.revenue, metrics.profit, 
+                        metrics.employees_count, metrics.year, metrics.month
+                    )
                 
                 return {"message": "Metrics created successfully", "metrics_id": metrics_id}
                 
@@ -661,26 +1071,23 @@ async def get_dashboard_stats(current_user: User = Depends(get_current_active_us
     """Получить статистику для дашборда"""
     if db_pool:
         try:
-            async with db_pool.acquire() as connection:
-                # Общая статистика
-                stats = await connection.fetchrow(
-                    """SELECT 
-                        (SELECT COUNT(*) FROM companies) as total_companies,
-                        (SELECT COUNT(*) FROM investment_proposals WHERE status = 'active') as active_proposals,
-                        (SELECT COUNT(*) FROM investor_interests) as total_interests,
-                        (SELECT SUM(investment_amount) FROM investment_proposals WHERE status = 'active') as total_funding_sought
-                    """
-                )
+            async with read_db.acquire() as connection:
+                # Общая статистика (агрегаты поддерживаются триггерами, см. schema.sql)
+                with track_query("dashboard_stats"):
+                    stats = await connection.fetchrow(
+                        """SELECT total_companies, active_proposals, total_interests, total_funding_sought
+                           FROM dashboard_totals"""
+                    )
                 
                 # Топ отраслей
-                industries = await connection.fetch(
-                    """SELECT industry, COUNT(*) as count 
-                       FROM investment_proposals 
-                       WHERE status = 'active' 
-                       GROUP BY industry 
-                       ORDER BY count DESC 
-                       LIMIT 5"""
-                )
+                with track_query("dashboard_top_industries"):
+                    industries = await connection.fetch(
+                        """SELECT industry, active_proposals as count 
+                           FROM dashboard_industry_stats 
+                           WHERE active_proposals > 0 
+                           ORDER BY active_proposals DESC 
+                           LIMIT 5"""
+                    )
                 
                 return {
                     "total_companies": stats['total_companies'],
@@ -707,6 +1114,55 @@ async def get_dashboard_stats(current_user: User = Depends(get_current_active_us
         ]
     }
 
+# --- Exports ---
+# Whole-table exports for analysts; ordered by id so repeated exports diff cleanly
+EXPORT_TABLES = {
+    "companies": "companies",
+    "investment-proposals": "investment_proposals",
+}
+EXPORT_QUERIES = {name: f"SELECT * FROM {table} ORDER BY id" for name, table in EXPORT_TABLES.items()}
+# Rows per Parquet row group
+EXPORT_PARQUET_BATCH = int(os.getenv("EXPORT_PARQUET_BATCH", "10000"))
+
+def _export_response(name: str, file_format: str):
+    file_format = file_format.lower()
+    if file_format not in ("csv", "parquet"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="file_format must be csv or parquet")
+    if not db_pool:
+        raise HTTPException(status_code=503, detail="Export requires a database connection")
+    query = EXPORT_QUERIES[name]
+    headers = {"Content-Disposition": f'attachment; filename="{name}.{file_format}"'}
+    logger.info(f"📦 Exporting {name} as {file_format}")
+    if file_format == "parquet":
+        if not parquet_available():
+            raise HTTPException(status_code=501, detail="Parquet export requires pyarrow")
+        return StreamingResponse(
+            stream_parquet(read_db, query, batch_size=EXPORT_PARQUET_BATCH, table=EXPORT_TABLES[name]),
+            media_type="application/vnd.apache.parquet",
+            headers=headers,
+        )
+    return StreamingResponse(
+        stream_copy_csv(read_db, query),
+        media_type="text/csv; charset=utf-8",
+        headers=headers,
+    )
+
+@app.get("/export/companies")
+async def export_companies(
+    file_format: str = "csv",
+    current_user: User = Depends(get_current_active_user)
+):
+    """Выгрузить все компании (CSV через COPY или Parquet)"""
+    return _export_response("companies", file_format)
+
+@app.get("/export/investment-proposals")
+async def export_investment_proposals(
+    file_format: str = "csv",
+    current_user: User = Depends(get_current_active_user)
+):
+    """Выгрузить все инвестиционные предложения (CSV через COPY или Parquet)"""
+    return _export_response("investment-proposals", file_format)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,113 @@
+import os
+import time
+
+from fastapi import Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# With several uvicorn workers set PROMETHEUS_MULTIPROC_DIR to an empty,
+# writable directory: each worker then keeps its samples in its own mmap
+# files (no cross-process locking) and /metrics aggregates all of them.
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+METRICS_ENABLED = os.getenv("ENABLE_METRICS", "true").lower() in ("1", "true", "yes")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route template and status",
+    ["method", "route", "status"],
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route"], buckets=LATENCY_BUCKETS,
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "Requests currently being handled",
+    ["method"], multiprocess_mode="livesum",
+)
+DB_QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds", "Database query latency by query name",
+    ["query"], buckets=LATENCY_BUCKETS,
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections", "Pool connections by state (size, idle, acquired)",
+    ["pool", "state"], multiprocess_mode="livesum",
+)
+DB_POOL_ACQUIRE_WAIT = Histogram(
+    "db_pool_acquire_wait_seconds", "Time spent waiting in pool.acquire()",
+    ["pool"], buckets=WAIT_BUCKETS,
+)
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_acquire_timeouts_total", "pool.acquire() calls that timed out", ["pool"],
+)
+
+
+def track_query(name: str):
+    """``with track_query("list_companies"): ...`` observes the block's duration"""
+    return DB_QUERY_LATENCY.labels(name).time()
+
+
+def publish_pool_stats(pool_name: str, size: int, idle: int, acquired: int):
+    DB_POOL_CONNECTIONS.labels(pool_name, "size").set(size)
+    DB_POOL_CONNECTIONS.labels(pool_name, "idle").set(idle)
+    DB_POOL_CONNECTIONS.labels(pool_name, "acquired").set(acquired)
+
+
+def metrics_response() -> Response:
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(content=generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+def mark_worker_stopped():
+    """Drop this worker's live gauges from the multiprocess aggregate"""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request count, latency and in-flight gauge.
+
+    Requests are labelled by route template (``/companies/{company_id}``),
+    which the router stores in the scope, so ids never create new series.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        started = time.perf_counter()
+        in_flight = HTTP_IN_FLIGHT.labels(method)
+        in_flight.inc()
+
+        async def send_and_record(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_record)
+        finally:
+            in_flight.dec()
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+            HTTP_LATENCY.labels(method, route).observe(time.perf_counter() - started)
@@ -0,0 +1,42 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from fastapi import HTTPException, status
+
+# Response header carrying the cursor for the next page (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Expected type of each keyset column, so a forged cursor fails here with a
+# 400 instead of inside the database driver
+CURSOR_KEY_TYPES = {"id": int, "created_at": datetime}
+
+
+def encode_cursor(values: dict) -> str:
+    """Pack keyset values into an opaque, URL-safe cursor string"""
+    payload = {
+        key: {"dt": value.isoformat()} if isinstance(value, datetime) else value
+        for key, value in values.items()
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *keys: str) -> dict:
+    """Unpack a cursor produced by encode_cursor; 400 if it is malformed or lacks keys"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = {}
+        for key in keys:
+            value = payload[key]
+            if isinstance(value, dict):
+                value = datetime.fromisoformat(value["dt"])
+            expected = CURSOR_KEY_TYPES.get(key)
+            if expected is not None and (not isinstance(value, expected) or isinstance(value, bool)):
+                raise TypeError(f"cursor key {key} must be {expected.__name__}")
+            values[key] = value
+        return values
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
@@ -0,0 +1,92 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from metrics import DB_POOL_ACQUIRE_WAIT, DB_POOL_TIMEOUTS, publish_pool_stats
+from profiling import profiled
+
+
+def pool_options_from_env() -> dict:
+    """Keyword arguments for asyncpg.create_pool (also accepted by databases.Database)"""
+    return {
+        "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "10")),
+        "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+        "max_inactive_connection_lifetime": float(os.getenv("DB_POOL_MAX_INACTIVE_LIFETIME", "300")),
+        "statement_cache_size": int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100")),
+        # 0 disables the per-statement timeout
+        "command_timeout": float(os.getenv("DB_COMMAND_TIMEOUT", "0")) or None,
+    }
+
+
+def acquire_timeout_from_env() -> Optional[float]:
+    return float(os.getenv("DB_POOL_TIMEOUT", "30")) or None
+
+
+class InstrumentedPool:
+    """asyncpg pool wrapper that records how long callers wait in ``acquire()``.
+
+    ``acquire()`` is an async context manager like the asyncpg one and
+    enforces ``acquire_timeout`` by default, so an exhausted pool fails fast
+    instead of queueing requests forever. The same numbers are exported as
+    Prometheus metrics labelled with ``name``. Everything else is delegated
+    to the wrapped pool.
+    """
+
+    def __init__(self, pool, acquire_timeout: Optional[float] = None, name: str = "primary"):
+        self._pool = pool
+        self.acquire_timeout = acquire_timeout
+        self.name = name
+        self.acquired = 0
+        self.acquires_total = 0
+        self.timeouts_total = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def __getattr__(self, name):
+        return getattr(self._pool, name)
+
+    @asynccontextmanager
+    async def acquire(self, timeout: Optional[float] = None):
+        started = time.perf_counter()
+        try:
+            connection = await self._pool.acquire(
+                timeout=self.acquire_timeout if timeout is None else timeout
+            )
+        except asyncio.TimeoutError:
+            self.timeouts_total += 1
+            DB_POOL_TIMEOUTS.labels(self.name).inc()
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            DB_POOL_ACQUIRE_WAIT.labels(self.name).observe(waited)
+        self.acquires_total += 1
+        self.acquired += 1
+        self._publish()
+        try:
+            # Records queries on the request profile when profiling is on
+            yield profiled(connection)
+        finally:
+            self.acquired -= 1
+            await self._pool.release(connection)
+            self._publish()
+
+    def _publish(self):
+        publish_pool_stats(self.name, self._pool.get_size(), self._pool.get_idle_size(), self.acquired)
+
+    def stats(self) -> dict:
+        attempts = self.acquires_total + self.timeouts_total
+        return {
+            "min_size": self._pool.get_min_size(),
+            "max_size": self._pool.get_max_size(),
+            "size": self._pool.get_size(),
+            "idle": self._pool.get_idle_size(),
+            "acquired": self.acquired,
+            "acquires_total": self.acquires_total,
+            "timeouts_total": self.timeouts_total,
+            "wait_seconds_avg": self.wait_seconds_total / attempts if attempts else 0.0,
+            "wait_seconds_max": self.wait_seconds_max,
+        }
@@ -0,0 +1,324 @@
+import functools
+import inspect
+import logging
+import os
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Callable, List, Optional
+
+import databases
+from fastapi.routing import APIRoute
+
+logger = logging.getLogger("profiling")
+
+PROFILING_ENABLED = os.getenv("PROFILE_REQUESTS", "false").lower() in ("1", "true", "yes")
+# More queries than this in one request is reported as a likely N+1
+PROFILE_QUERY_THRESHOLD = int(os.getenv("PROFILE_QUERY_THRESHOLD", "10"))
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|(?<![$\w])\d+(?:\.\d+)?")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql: str) -> str:
+    """SQL with literals replaced by ? and whitespace collapsed, for grouping"""
+    return _WHITESPACE.sub(" ", _LITERALS.sub("?", sql)).strip()[:200]
+
+
+class RequestProfile:
+    __slots__ = ("queries", "db_seconds", "endpoint_done")
+
+    def __init__(self):
+        self.queries: List[tuple] = []
+        self.db_seconds = 0.0
+        # perf_counter() when the endpoint function returned
+        self.endpoint_done: Optional[float] = None
+
+    def record_query(self, sql: str, seconds: float, rows: Optional[int]) -> int:
+        """Record one query; returns its index for add_to_query"""
+        self.queries.append((fingerprint(sql), seconds, rows))
+        self.db_seconds += seconds
+        return len(self.queries) - 1
+
+    def add_to_query(self, index: int, seconds: float, rows: int):
+        """Charge a cursor fetch to the query that opened the cursor"""
+        sql, total, total_rows = self.queries[index]
+        self.queries[index] = (sql, total + seconds, (total_rows or 0) + rows)
+        self.db_seconds += seconds
+
+
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+
+
+def _row_count(result: Any) -> int:
+    if result is None:
+        return 0
+    return len(result) if isinstance(result, list) else 1
+
+
+class ProfiledCursor:
+    """Cursor whose fetches are charged to the query that opened it, so a
+    streamed result counts as one query however many batches it takes"""
+
+    def __init__(self, cursor, profile: RequestProfile, index: int):
+        self._cursor = cursor
+        self._profile = profile
+        self._index = index
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    async def _timed(self, method: str, *args, **kwargs):
+        started = time.perf_counter()
+        result = await getattr(self._cursor, method)(*args, **kwargs)
+        self._profile.add_to_query(self._index, time.perf_counter() - started, _row_count(result))
+        return result
+
+    async def fetch(self, n, **kwargs):
+        return await self._timed("fetch", n, **kwargs)
+
+    async def fetchrow(self, **kwargs):
+        return await self._timed("fetchrow", **kwargs)
+
+
+class ProfiledCursorFactory:
+    """``await connection.cursor(...)`` is timed; ``async for`` is passed through untimed"""
+
+    def __init__(self, factory, profile: RequestProfile, sql: str):
+        self._factory = factory
+        self._profile = profile
+        self._sql = sql
+
+    def __aiter__(self):
+        return self._factory.__aiter__()
+
+    def __await__(self):
+        return self._open().__await__()
+
+    async def _open(self):
+        started = time.perf_counter()
+        cursor = await self._factory
+        index = self._profile.record_query(self._sql, time.perf_counter() - started, 0)
+        return ProfiledCursor(cursor, self._profile, index)
+
+
+class ProfiledStatement:
+    """Prepared statement proxy; cursors opened from it are profiled"""
+
+    def __init__(self, statement, profile: RequestProfile, sql: str):
+        self._statement = statement
+        self._profile = profile
+        self._sql = sql
+
+    def __getattr__(self, name):
+        return getattr(self._statement, name)
+
+    def cursor(self, *args, **kwargs):
+        return ProfiledCursorFactory(self._statement.cursor(*args, **kwargs), self._profile, self._sql)
+
+
+class ProfiledConnection:
+    """asyncpg connection proxy that records every query on the request profile.
+
+    Plain queries, executemany, COPY and cursors (including cursors of
+    prepared statements) are timed; anything else is passed through.
+    """
+
+    def __init__(self, connection, profile: RequestProfile):
+        self._connection = connection
+        self._profile = profile
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    async def _timed(self, method: str, query: str, *args, **kwargs):
+        started = time.perf_counter()
+        result = await getattr(self._connection, method)(query, *args, **kwargs)
+        rows = None if method == "execute" else _row_count(result)
+        self._profile.record_query(query, time.perf_counter() - started, rows)
+        return result
+
+    async def fetch(self, query, *args, **kwargs):
+        return await self._timed("fetch", query, *args, **kwargs)
+
+    async def fetchrow(self, query, *args, **kwargs):
+        return await self._timed("fetchrow", query, *args, **kwargs)
+
+    async def fetchval(self, query, *args, **kwargs):
+        return await self._timed("fetchval", query, *args, **kwargs)
+
+    async def execute(self, query, *args, **kwargs):
+        return await self._timed("execute", query, *args, **kwargs)
+
+    async def executemany(self, command, args, **kwargs):
+        started = time.perf_counter()
+        result = await self._connection.executemany(command, args, **kwargs)
+        self._profile.record_query(command, time.perf_counter() - started, None)
+        return result
+
+    async def copy_from_query(self, query, *args, **kwargs):
+        started = time.perf_counter()
+        result = await self._connection.copy_from_query(query, *args, **kwargs)
+        self._profile.record_query(f"COPY ({query}) TO STDOUT", time.perf_counter() - started, None)
+        return result
+
+    async def copy_records_to_table(self, table_name, *, records, **kwargs):
+        started = time.perf_counter()
+        result = await self._connection.copy_records_to_table(table_name, records=records, **kwargs)
+        rows = len(records) if hasattr(records, "__len__") else None
+        self._profile.record_query(f"COPY {table_name} FROM STDIN", time.perf_counter() - started, rows)
+        return result
+
+    def cursor(self, query, *args, **kwargs):
+        return ProfiledCursorFactory(self._connection.cursor(query, *args, **kwargs), self._profile, query)
+
+    async def prepare(self, query, **kwargs):
+        started = time.perf_counter()
+        statement = await self._connection.prepare(query, **kwargs)
+        self._profile.record_query(f"PREPARE {query}", time.perf_counter() - started, None)
+        return ProfiledStatement(statement, self._profile, query)
+
+
+def profiled(connection):
+    """Wrap a connection for the current request, or return it unchanged"""
+    profile = current_profile.get()
+    return connection if profile is None else ProfiledConnection(connection, profile)
+
+
+class ProfiledDatabase(databases.Database):
+    """databases.Database that records queries on the current request profile"""
+
+    async def _timed(self, method: str, query, values=None):
+        profile = current_profile.get()
+        call = getattr(super(), method)
+        if profile is None:
+            return await call(query, values)
+        started = time.perf_counter()
+        result = await call(query, values)
+        rows = None if method == "execute" else _row_count(result)
+        profile.record_query(str(query), time.perf_counter() - started, rows)
+        return result
+
+    async def fetch_all(self, query, values=None):
+        return await self._timed("fetch_all", query, values)
+
+    async def fetch_one(self, query, values=None):
+        return await self._timed("fetch_one", query, values)
+
+    async def fetch_val(self, query, values=None, column=0):
+        profile = current_profile.get()
+        if profile is None:
+            return await super().fetch_val(query, values, column=column)
+        started = time.perf_counter()
+        result = await super().fetch_val(query, values, column=column)
+        profile.record_query(str(query), time.perf_counter() - started, _row_count(result))
+        return result
+
+    async def execute(self, query, values=None):
+        return await self._timed("execute", query, values)
+
+
+def _mark_endpoint_done():
+    profile = current_profile.get()
+    if profile is not None:
+        profile.endpoint_done = time.perf_counter()
+
+
+def _timed_endpoint(endpoint: Callable) -> Callable:
+    # functools.wraps keeps the signature FastAPI inspects for dependencies
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                _mark_endpoint_done()
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                _mark_endpoint_done()
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """Route that notes when its endpoint returns, so the time until the
+    response starts can be reported as serialization (response_model
+    validation and JSON encoding)."""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+
+class ProfilingMiddleware:
+    """Opt-in per-request profile: Server-Timing header plus a log record.
+
+    ``db`` is the time spent in queries, ``serialize`` the time from the
+    endpoint returning to the response starting (needs ProfiledRoute),
+    ``app`` the rest of the handler (model building, dependencies) and
+    ``total`` the time until the response starts.
+
+    The header is sent with the response start, so for streamed responses
+    (``?stream=true``, exports) it only covers work done before the first
+    byte; cursor fetches and COPY made while streaming the body appear in
+    the log record, which is written when the response completes.
+    """
+
+    def __init__(self, app, query_threshold: int = PROFILE_QUERY_THRESHOLD):
+        self.app = app
+        self.query_threshold = query_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+        started = time.perf_counter()
+        timings = {"serialize": 0.0}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                now = time.perf_counter()
+                total = now - started
+                serialize = now - profile.endpoint_done if profile.endpoint_done else 0.0
+                app_seconds = max(total - profile.db_seconds - serialize, 0.0)
+                timing = (f"db;dur={profile.db_seconds * 1000:.1f};desc=\"{len(profile.queries)} queries\", "
+                          f"serialize;dur={serialize * 1000:.1f}, "
+                          f"app;dur={app_seconds * 1000:.1f}, total;dur={total * 1000:.1f}")
+                message["headers"] = [*message.get("headers", []), (b"server-timing", timing.encode())]
+                timings["serialize"] = serialize
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_profile.reset(token)
+            self._report(scope, profile, timings["serialize"], time.perf_counter() - started)
+
+    def _report(self, scope, profile: RequestProfile, serialize: float, total: float):
+        by_query = {}
+        for sql, seconds, rows in profile.queries:
+            entry = by_query.setdefault(sql, {"sql": sql, "count": 0, "ms": 0.0, "rows": 0})
+            entry["count"] += 1
+            entry["ms"] = round(entry["ms"] + seconds * 1000, 2)
+            entry["rows"] += rows or 0
+        fields = {
+            "path": scope["path"],
+            "queries": len(profile.queries),
+            "db_ms": round(profile.db_seconds * 1000, 2),
+            "serialize_ms": round(serialize * 1000, 2),
+            "total_ms": round(total * 1000, 2),
+            "query_breakdown": sorted(by_query.values(), key=lambda entry: -entry["ms"]),
+        }
+        logger.info("profile %s %s: %d queries, %.1fms db", scope["method"], scope["path"],
+                    len(profile.queries), profile.db_seconds * 1000, extra={"fields": fields})
+        if len(profile.queries) > self.query_threshold:
+            repeated, count = Counter(sql for sql, _, _ in profile.queries).most_common(1)[0]
+            logger.warning("possible N+1 on %s %s: %d queries, %dx %s", scope["method"],
+                           scope["path"], len(profile.queries), count, repeated,
+                           extra={"fields": fields})
@@ -0,0 +1,76 @@
+from dataclasses import dataclass
+from typing import List, Optional
+
+
+# Outbound-only representations of company cards. The card JSONB is built
+# by refresh_company_cards() in schema.sql, so it needs no validation on the
+# way out; these classes only fix the response shape. orjson serializes
+# dataclasses natively. Pydantic models in main.py remain for request
+# validation and the OpenAPI schema.
+@dataclass(slots=True)
+class ReviewCard:
+    id: int
+    author: str
+    rating: int
+    text: str
+    date: str
+
+
+@dataclass(slots=True)
+class CompanyCard:
+    id: int
+    name: str
+    # companies.category_id is nullable
+    category: Optional[str]
+    description: str
+    rating: float
+    reviewsCount: int
+    verified: bool
+    inn: str
+    region: str
+    yearFounded: int
+    employees: str
+    tags: List[str]
+    logo: str
+    phone: str
+    email: str
+    website: str
+    completedDeals: int
+    responseTime: str
+    services: List[str]
+    reviews: List[ReviewCard]
+
+    @classmethod
+    def from_card(cls, card: dict) -> "CompanyCard":
+        """Build from a company_cards.card document; keys outside the schema are dropped"""
+        return cls(
+            id=card["id"],
+            name=card["name"],
+            category=card["category"],
+            description=card["description"],
+            rating=card["rating"],
+            reviewsCount=card["reviewsCount"],
+            verified=card["verified"],
+            inn=card["inn"],
+            region=card["region"],
+            yearFounded=card["yearFounded"],
+            employees=card["employees"],
+            tags=card["tags"],
+            logo=card["logo"],
+            phone=card["phone"],
+            email=card["email"],
+            website=card["website"],
+            completedDeals=card["completedDeals"],
+            responseTime=card["responseTime"],
+            services=card["services"],
+            reviews=[
+                ReviewCard(
+                    id=review["id"],
+                    author=review["author"],
+                    rating=review["rating"],
+                    text=review["text"],
+                    date=review["date"],
+                )
+                for review in card["reviews"]
+            ],
+        )
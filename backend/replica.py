@@ -0,0 +1,105 @@
+import asyncio
+import logging
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Seconds the replica is behind the primary. 0 while it is streaming and has
+# replayed all WAL it received, so an idle primary does not look like growing
+# lag. With the WAL receiver disconnected the receive LSN stops moving and
+# replay soon catches up to it, so the age of the last replayed transaction
+# is reported instead; NULL (never replayed anything) counts as unhealthy.
+# Reading pg_stat_wal_receiver.status needs pg_read_all_stats.
+REPLICA_LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming')
+             AND pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+
+class ReplicaRouter:
+    """Sends read-only work to a replica pool while it is up and caught up.
+
+    ``acquire()`` has the same shape as ``pool.acquire()``. It hands out a
+    replica connection when the last health check passed and falls back to
+    the primary when the replica is missing, lagging more than ``max_lag``
+    seconds, or fails to give a connection. A background task re-checks the
+    replica every ``check_interval`` seconds so it is used again once it
+    recovers.
+    """
+
+    def __init__(self, primary, replica=None, max_lag: float = 10.0,
+                 check_interval: float = 5.0):
+        self.primary = primary
+        self.replica = replica
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.healthy = replica is not None
+        self.lag: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _mark(self, healthy: bool, reason: str = ""):
+        if healthy != self.healthy:
+            if healthy:
+                logger.info("✅ Read replica is healthy again, routing reads to it")
+            else:
+                logger.warning(f"⚠️ Read replica unavailable ({reason}), reading from primary")
+        self.healthy = healthy
+
+    @asynccontextmanager
+    async def acquire(self):
+        async with AsyncExitStack() as stack:
+            connection = None
+            if self.replica is not None and self.healthy:
+                try:
+                    connection = await stack.enter_async_context(self.replica.acquire())
+                except Exception as e:
+                    self._mark(False, str(e))
+            if connection is None:
+                connection = await stack.enter_async_context(self.primary.acquire())
+            yield connection
+
+    async def check(self):
+        if self.replica is None:
+            return
+        try:
+            async with self.replica.acquire() as connection:
+                lag = await connection.fetchval(REPLICA_LAG_QUERY)
+        except Exception as e:
+            self.lag = None
+            self._mark(False, str(e))
+            return
+        self.lag = None if lag is None else float(lag)
+        if self.lag is None:
+            self._mark(False, "no replayed transactions")
+        elif self.lag > self.max_lag:
+            self._mark(False, f"lag {self.lag:.1f}s")
+        else:
+            self._mark(True)
+
+    def start(self):
+        if self.replica is not None and self._task is None:
+            self._task = asyncio.create_task(self._check_periodically())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _check_periodically(self):
+        while True:
+            await self.check()
+            await asyncio.sleep(self.check_interval)
+
+    def stats(self) -> Optional[dict]:
+        if self.replica is None:
+            return None
+        return {**self.replica.stats(), "healthy": self.healthy, "lag_seconds": self.lag}
@@ -0,0 +1,77 @@
+import hashlib
+from typing import Any, Dict, Optional
+
+from fastapi import Request, Response
+
+from cache import TTLCache
+from json_response import dumps
+
+
+class CachedResponse:
+    __slots__ = ("body", "etag", "headers")
+
+    def __init__(self, body: bytes, headers: Optional[Dict[str, str]] = None):
+        self.body = body
+        # Strong validator: identical bytes give the same ETag in every worker
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.headers = headers or {}
+
+
+def serialize_json(content: Any) -> bytes:
+    """Compact UTF-8 JSON, the same bytes FastJSONResponse would send"""
+    return dumps(content)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison, so a W/ prefix is ignored"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def respond_cached(request: Request, entry: CachedResponse, cache_control: str) -> Response:
+    """Send a pre-serialized body, or 304 when the client already has it"""
+    headers = {**entry.headers, "ETag": entry.etag, "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+class ResponseCache:
+    """Pre-serialized JSON bodies for GET endpoints, keyed by path + query.
+
+    Hits skip the database and serialization entirely and answer
+    ``If-None-Match`` with 304. Writers call ``clear()`` after changing the
+    underlying tables; the TTL bounds staleness for changes made elsewhere.
+    """
+
+    def __init__(self, maxsize: int = 512, ttl: float = 60.0,
+                 cache_control: str = "no-cache"):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.cache_control = cache_control
+
+    @staticmethod
+    def key_for(request: Request) -> str:
+        return f"{request.url.path}?{request.url.query}"
+
+    def lookup(self, request: Request) -> Optional[Response]:
+        entry = self._entries.get(self.key_for(request))
+        if entry is None:
+            return None
+        return self._respond(request, entry)
+
+    def store(self, request: Request, content: Any,
+              headers: Optional[Dict[str, str]] = None) -> Response:
+        entry = CachedResponse(serialize_json(content), headers)
+        self._entries.set(self.key_for(request), entry)
+        return self._respond(request, entry)
+
+    def clear(self):
+        self._entries.clear()
+
+    def _respond(self, request: Request, entry: CachedResponse) -> Response:
+        return respond_cached(request, entry, self.cache_control)
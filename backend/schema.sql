@@ -2,8 +2,16 @@
 -- Globex B2B Маркетплейс - Полная схема базы данных
 -- =====================================================
 
+-- Триграммные индексы для поиска по подстроке и нечеткого поиска (ILIKE, %, similarity)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
 -- Удалить существующие таблицы и создать заново
+DROP TABLE IF EXISTS dashboard_counter_shards CASCADE;
+DROP TABLE IF EXISTS dashboard_industry_stats CASCADE;
+DROP TABLE IF EXISTS dashboard_stats CASCADE;
+DROP TABLE IF EXISTS investor_interests CASCADE;
 DROP TABLE IF EXISTS investment_proposals CASCADE;
+DROP TABLE IF EXISTS company_cards CASCADE;
 DROP TABLE IF EXISTS reviews CASCADE;
 DROP TABLE IF EXISTS company_services CASCADE;
 DROP TABLE IF EXISTS company_tags CASCADE;
@@ -124,6 +132,20 @@ CREATE TABLE investment_proposals (
     updated_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- =====================================================
+-- Таблица заявок инвесторов
+-- =====================================================
+CREATE TABLE investor_interests (
+    id SERIAL PRIMARY KEY,
+    proposal_id INTEGER REFERENCES investment_proposals(id) ON DELETE CASCADE,
+    investor_name VARCHAR(255) NOT NULL,
+    investor_email VARCHAR(255) NOT NULL,
+    investor_phone VARCHAR(20),
+    investment_amount DECIMAL(15,2) NOT NULL,
+    message TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
 -- =====================================================
 -- Индексы для производительности
 -- =====================================================
@@ -133,6 +155,9 @@ CREATE INDEX idx_companies_category ON companies(category_id);
 CREATE INDEX idx_companies_region ON companies(region);
 CREATE INDEX idx_companies_verified ON companies(verified);
 CREATE INDEX idx_companies_rating ON companies(rating);
+-- Keyset-пагинация /companies/ идет по первичному ключу company_cards (company_id > :after_id), отдельный индекс не нужен
+CREATE INDEX idx_companies_name_trgm ON companies USING GIN (name gin_trgm_ops);
+CREATE INDEX idx_companies_region_trgm ON companies USING GIN (region gin_trgm_ops);
 CREATE INDEX idx_reviews_company ON reviews(company_id);
 CREATE INDEX idx_reviews_rating ON reviews(rating);
 
@@ -155,6 +180,393 @@ CREATE TRIGGER update_companies_updated_at
     BEFORE UPDATE ON companies 
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+-- =====================================================
+-- Готовые карточки компаний (денормализованная витрина)
+-- =====================================================
+-- Карточка в формате API (модель Company в main.py) собирается один раз при
+-- записи в companies / company_tags / company_services / reviews, а чтение
+-- /companies/ и /companies/{id} берет готовый JSONB без JOIN-ов.
+CREATE TABLE company_cards (
+    company_id INTEGER PRIMARY KEY REFERENCES companies(id) ON DELETE CASCADE,
+    card JSONB NOT NULL,
+    refreshed_at TIMESTAMPTZ DEFAULT NOW(),
+    -- Полнотекстовый поиск (/companies/search): русская и английская морфология,
+    -- веса A - название, B - теги и услуги, C - описание
+    search_vector TSVECTOR GENERATED ALWAYS AS (
+        setweight(to_tsvector('russian', coalesce(card->>'name', '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(card->>'name', '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(card->>'tags', '') || ' ' || coalesce(card->>'services', '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(card->>'tags', '') || ' ' || coalesce(card->>'services', '')), 'B') ||
+        setweight(to_tsvector('russian', coalesce(card->>'description', '')), 'C') ||
+        setweight(to_tsvector('english', coalesce(card->>'description', '')), 'C')
+    ) STORED
+);
+
+CREATE INDEX idx_company_cards_search ON company_cards USING GIN (search_vector);
+
+-- Пересобрать карточки указанных компаний (удаленные компании пропускаются)
+CREATE OR REPLACE FUNCTION refresh_company_cards(p_company_ids INTEGER[])
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO company_cards (company_id, card, refreshed_at)
+    SELECT c.id,
+           jsonb_build_object(
+               'id', c.id,
+               'name', c.name,
+               'category', cat.id,
+               'description', c.description,
+               'rating', c.rating,
+               'reviewsCount', c.reviews_count,
+               'verified', c.verified,
+               'inn', c.inn,
+               'region', c.region,
+               'yearFounded', c.year_founded,
+               'employees', c.employees,
+               'tags', COALESCE((
+                   SELECT jsonb_agg(ct.tag ORDER BY ct.id)
+                   FROM company_tags ct WHERE ct.company_id = c.id
+               ), '[]'::jsonb),
+               'logo', c.logo,
+               'phone', c.phone,
+               'email', c.email,
+               'website', c.website,
+               'completedDeals', c.completed_deals,
+               'responseTime', c.response_time,
+               'services', COALESCE((
+                   SELECT jsonb_agg(cs.service ORDER BY cs.id)
+                   FROM company_services cs WHERE cs.company_id = c.id
+               ), '[]'::jsonb),
+               'reviews', COALESCE((
+                   SELECT jsonb_agg(
+                              jsonb_build_object(
+                                  'id', rv.id,
+                                  'author', rv.author,
+                                  'rating', rv.rating,
+                                  'text', rv.text,
+                                  'date', to_char(rv.date, 'YYYY-MM-DD')
+                              )
+                              ORDER BY rv.created_at DESC
+                          )
+                   FROM reviews rv WHERE rv.company_id = c.id
+               ), '[]'::jsonb)
+           ),
+           NOW()
+    FROM companies c
+    LEFT JOIN categories cat ON c.category_id = cat.id
+    WHERE c.id = ANY(p_company_ids)
+    ON CONFLICT (company_id) DO UPDATE
+        SET card = EXCLUDED.card,
+            refreshed_at = EXCLUDED.refreshed_at;
+END;
+$$ language 'plpgsql';
+
+-- Триггеры уровня оператора: одна пересборка на компанию, сколько бы строк
+-- ни изменил INSERT/UPDATE/DELETE (важно для пакетной вставки тегов и услуг)
+CREATE OR REPLACE FUNCTION refresh_company_cards_from_rows()
+RETURNS TRIGGER AS $$
+DECLARE
+    key_column TEXT := CASE WHEN TG_TABLE_NAME = 'companies' THEN 'id' ELSE 'company_id' END;
+    changed_ids INTEGER[] := '{}';
+    ids INTEGER[];
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        EXECUTE format('SELECT array_agg(DISTINCT %I) FROM new_rows', key_column) INTO ids;
+        changed_ids := changed_ids || COALESCE(ids, '{}');
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        EXECUTE format('SELECT array_agg(DISTINCT %I) FROM old_rows', key_column) INTO ids;
+        changed_ids := changed_ids || COALESCE(ids, '{}');
+    END IF;
+    PERFORM refresh_company_cards(changed_ids);
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER companies_cards_insert AFTER INSERT ON companies
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION refresh_company_cards_from_rows();
+CREATE TRIGGER companies_cards_update AFTER UPDATE ON companies
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION refresh_company_cards_from_rows();
+CREATE TRIGGER company_tags_cards_insert AFTER INSERT ON company_tags
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION refresh_company_cards_from_rows();
+CREATE TRIGGER company_tags_cards_update AFTER UPDATE ON company_tags
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION refresh_company_cards_from_rows();
+CREATE TRIGGER company_tags_cards_delete AFTER DELETE ON company_tags
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION refresh_company_cards_from_rows();
+CREATE TRIGGER company_services_cards_insert AFTER INSERT ON company_services
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION refresh_company_cards_from_rows();
+CREATE TRIGGER company_services_cards_update AFTER UPDATE ON company_services
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION refresh_company_cards_from_rows();
+CREATE TRIGGER company_services_cards_delete AFTER DELETE ON company_services
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION refresh_company_cards_from_rows();
+CREATE TRIGGER reviews_cards_insert AFTER INSERT ON reviews
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION refresh_company_cards_from_rows();
+CREATE TRIGGER reviews_cards_update AFTER UPDATE ON reviews
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION refresh_company_cards_from_rows();
+CREATE TRIGGER reviews_cards_delete AFTER DELETE ON reviews
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION refresh_company_cards_from_rows();
+
+-- =====================================================
+-- Агрегаты дашборда (/dashboard/stats)
+-- =====================================================
+-- Счетчики поддерживаются триггерами уровня оператора, поэтому дашборд
+-- читает одну строку (dashboard_totals) вместо COUNT/SUM по таблицам. Дрейф (например, после
+-- TRUNCATE или ручных правок) исправляет reconcile_dashboard_stats(),
+-- которую backend периодически вызывает.
+CREATE TABLE dashboard_stats (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),  -- ровно одна строка
+    total_companies BIGINT NOT NULL DEFAULT 0,
+    active_proposals BIGINT NOT NULL DEFAULT 0,
+    total_interests BIGINT NOT NULL DEFAULT 0,
+    total_funding_sought DECIMAL(18,2) NOT NULL DEFAULT 0,
+    reconciled_at TIMESTAMPTZ
+);
+
+CREATE TABLE dashboard_industry_stats (
+    industry VARCHAR(100) PRIMARY KEY,
+    active_proposals BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO dashboard_stats DEFAULT VALUES;
+
+-- Дельты total_companies и total_interests. Каждая вставка компании (в том
+-- числе каждый чанк импорта) и каждый интерес инвестора обновляли бы одну
+-- строку dashboard_stats и держали ее блокировку до конца транзакции; вместо
+-- этого сессия пишет в свой шард (pg_backend_pid() % 16), а читатели
+-- складывают шарды с базовым значением (представление dashboard_totals).
+-- Строки шардов создаются заранее, поэтому запись - всегда UPDATE, и
+-- reconcile_dashboard_stats() может обнулить их под блокировкой.
+CREATE TABLE dashboard_counter_shards (
+    counter VARCHAR(50) NOT NULL,
+    shard SMALLINT NOT NULL,
+    value BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (counter, shard)
+);
+
+INSERT INTO dashboard_counter_shards (counter, shard)
+SELECT counter, shard
+FROM unnest(ARRAY['total_companies', 'total_interests']) AS counter,
+     generate_series(0, 15) AS shard;
+
+CREATE VIEW dashboard_totals AS
+SELECT s.total_companies + COALESCE(sh.companies, 0) AS total_companies,
+       s.active_proposals,
+       s.total_interests + COALESCE(sh.interests, 0) AS total_interests,
+       s.total_funding_sought
+FROM dashboard_stats s,
+     (SELECT SUM(value) FILTER (WHERE counter = 'total_companies') AS companies,
+             SUM(value) FILTER (WHERE counter = 'total_interests') AS interests
+      FROM dashboard_counter_shards) sh;
+
+-- Изменить шард счетчика TG_ARGV[0] на число вставленных/удаленных строк
+CREATE OR REPLACE FUNCTION dashboard_count_rows()
+RETURNS TRIGGER AS $$
+DECLARE
+    delta BIGINT;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT COUNT(*) INTO delta FROM new_rows;
+    ELSE
+        SELECT -COUNT(*) INTO delta FROM old_rows;
+    END IF;
+    IF delta <> 0 THEN
+        UPDATE dashboard_counter_shards
+        SET value = value + delta
+        WHERE counter = TG_ARGV[0] AND shard = pg_backend_pid() % 16;
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+-- Учесть вставленные/удаленные активные предложения. Строку dashboard_stats
+-- трогаем только при ненулевой дельте, чтобы не брать ее блокировку зря
+CREATE OR REPLACE FUNCTION dashboard_count_proposals()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        UPDATE dashboard_stats s
+        SET active_proposals = s.active_proposals - d.n,
+            total_funding_sought = s.total_funding_sought - d.amount
+        FROM (
+            SELECT COUNT(*) AS n, COALESCE(SUM(investment_amount), 0) AS amount
+            FROM old_rows WHERE status = 'active'
+        ) d
+        WHERE d.n > 0;
+        UPDATE dashboard_industry_stats s
+        SET active_proposals = s.active_proposals - d.n
+        FROM (
+            SELECT industry, COUNT(*) AS n
+            FROM old_rows WHERE status = 'active'
+            GROUP BY industry
+        ) d
+        WHERE s.industry = d.industry;
+    END IF;
+    IF TG_OP = 'INSERT' THEN
+        UPDATE dashboard_stats s
+        SET active_proposals = s.active_proposals + d.n,
+            total_funding_sought = s.total_funding_sought + d.amount
+        FROM (
+            SELECT COUNT(*) AS n, COALESCE(SUM(investment_amount), 0) AS amount
+            FROM new_rows WHERE status = 'active'
+        ) d
+        WHERE d.n > 0;
+        INSERT INTO dashboard_industry_stats AS s (industry, active_proposals)
+        SELECT industry, COUNT(*)
+        FROM new_rows WHERE status = 'active'
+        GROUP BY industry
+        ON CONFLICT (industry) DO UPDATE
+            SET active_proposals = s.active_proposals + EXCLUDED.active_proposals;
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+-- Изменение статуса, суммы или отрасли предложения. Триггер строчный:
+-- PostgreSQL не разрешает таблицы переходов вместе со списком столбцов
+-- (UPDATE OF), а без списка столбцов сюда попадали бы и сброс счетчика
+-- просмотров, и interested_investors + 1 - все ждали бы одну строку.
+CREATE OR REPLACE FUNCTION dashboard_update_proposal()
+RETURNS TRIGGER AS $$
+DECLARE
+    was_active BOOLEAN := COALESCE(OLD.status = 'active', FALSE);
+    is_active BOOLEAN := COALESCE(NEW.status = 'active', FALSE);
+BEGIN
+    IF was_active <> is_active
+       OR (is_active AND OLD.investment_amount IS DISTINCT FROM NEW.investment_amount) THEN
+        UPDATE dashboard_stats
+        SET active_proposals = active_proposals - was_active::INT + is_active::INT,
+            total_funding_sought = total_funding_sought
+                - CASE WHEN was_active THEN OLD.investment_amount ELSE 0 END
+                + CASE WHEN is_active THEN NEW.investment_amount ELSE 0 END;
+    END IF;
+    IF was_active AND (NOT is_active OR OLD.industry IS DISTINCT FROM NEW.industry) THEN
+        UPDATE dashboard_industry_stats
+        SET active_proposals = active_proposals - 1
+        WHERE industry = OLD.industry;
+    END IF;
+    IF is_active AND (NOT was_active OR OLD.industry IS DISTINCT FROM NEW.industry) THEN
+        INSERT INTO dashboard_industry_stats AS s (industry, active_proposals)
+        VALUES (NEW.industry, 1)
+        ON CONFLICT (industry) DO UPDATE
+            SET active_proposals = s.active_proposals + 1;
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+-- Пересчитать агрегаты с нуля; параллельный вызов из другого воркера пропускается
+CREATE OR REPLACE FUNCTION reconcile_dashboard_stats()
+RETURNS VOID AS $$
+BEGIN
+    IF NOT pg_try_advisory_xact_lock(hashtext('reconcile_dashboard_stats')) THEN
+        RETURN;
+    END IF;
+    -- Блокировки строк ждут завершения пишущих транзакций и не дают начаться
+    -- новым; шарды обнуляются, пересчитанные значения попадают в базовую строку
+    PERFORM 1 FROM dashboard_stats FOR UPDATE;
+    UPDATE dashboard_counter_shards SET value = 0;
+    UPDATE dashboard_stats SET
+        total_companies = (SELECT COUNT(*) FROM companies),
+        active_proposals = (SELECT COUNT(*) FROM investment_proposals WHERE status = 'active'),
+        total_interests = (SELECT COUNT(*) FROM investor_interests),
+        total_funding_sought = (
+            SELECT COALESCE(SUM(investment_amount), 0) FROM investment_proposals WHERE status = 'active'
+        ),
+        reconciled_at = NOW();
+    DELETE FROM dashboard_industry_stats;
+    INSERT INTO dashboard_industry_stats (industry, active_proposals)
+    SELECT industry, COUNT(*)
+    FROM investment_proposals WHERE status = 'active'
+    GROUP BY industry;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER companies_dashboard_insert AFTER INSERT ON companies
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION dashboard_count_rows('total_companies');
+CREATE TRIGGER companies_dashboard_delete AFTER DELETE ON companies
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION dashboard_count_rows('total_companies');
+CREATE TRIGGER investor_interests_dashboard_insert AFTER INSERT ON investor_interests
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION dashboard_count_rows('total_interests');
+CREATE TRIGGER investor_interests_dashboard_delete AFTER DELETE ON investor_interests
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION dashboard_count_rows('total_interests');
+CREATE TRIGGER investment_proposals_dashboard_insert AFTER INSERT ON investment_proposals
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION dashboard_count_proposals();
+CREATE TRIGGER investment_proposals_dashboard_update
+    AFTER UPDATE OF status, investment_amount, industry ON investment_proposals
+    FOR EACH ROW
+    WHEN (OLD.status IS DISTINCT FROM NEW.status
+          OR OLD.investment_amount IS DISTINCT FROM NEW.investment_amount
+          OR OLD.industry IS DISTINCT FROM NEW.industry)
+    EXECUTE FUNCTION dashboard_update_proposal();
+CREATE TRIGGER investment_proposals_dashboard_delete AFTER DELETE ON investment_proposals
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION dashboard_count_proposals();
+
+-- =====================================================
+-- Уведомления об изменениях для локальных кешей воркеров
+-- =====================================================
+-- Каждый воркер main_db слушает канал cache_invalidation (LISTEN) и сбрасывает
+-- свои in-process кеши. Полезная нагрузка: {"table": ..., "key": ...}; key
+-- задается для построчных триггеров (TG_ARGV[0] - имя колонки-ключа), иначе
+-- NULL и сбрасывается все, что зависит от таблицы. Одинаковые уведомления в
+-- одной транзакции Postgres доставляет один раз.
+CREATE OR REPLACE FUNCTION notify_cache_invalidation()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_LEVEL = 'ROW' THEN
+        IF TG_OP <> 'INSERT' THEN
+            PERFORM pg_notify('cache_invalidation', json_build_object(
+                'table', TG_TABLE_NAME, 'key', to_jsonb(OLD) ->> TG_ARGV[0])::text);
+        END IF;
+        IF TG_OP <> 'DELETE' THEN
+            PERFORM pg_notify('cache_invalidation', json_build_object(
+                'table', TG_TABLE_NAME, 'key', to_jsonb(NEW) ->> TG_ARGV[0])::text);
+        END IF;
+    ELSE
+        PERFORM pg_notify('cache_invalidation', json_build_object(
+            'table', TG_TABLE_NAME, 'key', NULL)::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER companies_cache_invalidation
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON companies
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidation();
+CREATE TRIGGER categories_cache_invalidation
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON categories
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidation();
+-- Счетчики views_count / interested_investors обновляются постоянно и в кешах
+-- не участвуют, поэтому UPDATE отслеживается только по остальным колонкам
+CREATE TRIGGER investment_proposals_cache_invalidation
+    AFTER INSERT OR DELETE OR TRUNCATE OR UPDATE OF
+        company_id, title, description, investment_amount, equity_percentage,
+        expected_return, investment_type, business_stage, industry, location,
+        min_investment, max_investment, funding_deadline, use_of_funds,
+        financial_highlights, team_info, market_opportunity,
+        competitive_advantages, risks, status, created_by
+    ON investment_proposals
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidation();
+-- Кеш пользователей ключуется по username; новые пользователи в нем не лежат
+CREATE TRIGGER users_cache_invalidation
+    AFTER UPDATE OR DELETE ON users
+    FOR EACH ROW EXECUTE FUNCTION notify_cache_invalidation('username');
+
 -- =====================================================
 -- Начальные данные: Категории
 -- =====================================================
@@ -301,4 +713,6 @@ CREATE INDEX idx_investment_proposals_status ON investment_proposals(status);
 CREATE INDEX idx_investment_proposals_investment_type ON investment_proposals(investment_type);
 CREATE INDEX idx_investment_proposals_business_stage ON investment_proposals(business_stage);
 CREATE INDEX idx_investment_proposals_industry ON investment_proposals(industry);
-CREATE INDEX idx_investment_proposals_created_at ON investment_proposals(created_at DESC);
\ No newline at end of file
+CREATE INDEX idx_investment_proposals_location_trgm ON investment_proposals USING GIN (location gin_trgm_ops);
+-- Keyset-пагинация ленты: ORDER BY created_at DESC, id DESC и предикат (created_at, id) < (...)
+CREATE INDEX idx_investment_proposals_created_at_id ON investment_proposals(created_at DESC, id DESC);
\ No newline at end of file
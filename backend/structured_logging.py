@@ -0,0 +1,180 @@
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import time
+from datetime import datetime, UTC
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Request bodies on these paths carry passwords and are never logged
+SENSITIVE_PATHS = ("/token", "/register")
+
+access_logger = logging.getLogger("access")
+
+_listener: Optional[QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; ``extra={"fields": {...}}`` becomes top-level keys"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, UTC).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RecordQueueHandler(QueueHandler):
+    """QueueHandler that leaves all formatting to the listener's handler.
+
+    The stdlib ``prepare()`` formats the record on the calling thread (the
+    event loop, tracebacks included) and then drops ``exc_info``. Here only
+    the message arguments are merged, since they may be mutable objects the
+    caller changes later; ``exc_info`` is kept for the formatter.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def configure_logging(level: Optional[str] = None, log_format: Optional[str] = None, stream=None):
+    """Route all logging through a queue drained by a background thread.
+
+    The event loop only enqueues records; formatting and writing to
+    ``stream`` (stderr by default) happen on the QueueListener thread.
+    LOG_FORMAT=json switches to JsonFormatter. Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return
+    level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    log_format = (log_format or os.getenv("LOG_FORMAT", "text")).lower()
+
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JsonFormatter() if log_format == "json" else logging.Formatter(TEXT_FORMAT))
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.handlers = [RecordQueueHandler(log_queue)]
+    root.setLevel(level)
+    _listener = QueueListener(log_queue, handler)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _parse_sample_rates(value: str) -> Dict[str, float]:
+    """"/companies/=0.1,/categories/=0" -> {"/companies/": 0.1, "/categories/": 0.0}"""
+    rates = {}
+    for item in value.split(","):
+        prefix, _, rate = item.strip().partition("=")
+        if prefix and rate:
+            rates[prefix] = float(rate)
+    return rates
+
+
+def request_logging_options_from_env() -> dict:
+    return {
+        "sample_rates": _parse_sample_rates(os.getenv("LOG_SAMPLE_RATES", "")),
+        "default_sample_rate": float(os.getenv("LOG_SAMPLE_RATE", "1")),
+        "log_bodies": os.getenv("LOG_REQUEST_BODIES", "false").lower() in ("1", "true", "yes"),
+    }
+
+
+class RequestLoggingMiddleware:
+    """Pure ASGI access log: one structured record per request.
+
+    Successful requests are sampled per path prefix (longest prefix wins),
+    while 4xx/5xx responses and unhandled exceptions are always logged. Up
+    to ``body_limit`` bytes of the request body are captured as the app
+    reads it, so nothing is buffered up front; the body is only logged for
+    errors or when ``log_bodies`` is on, and never for SENSITIVE_PATHS.
+    """
+
+    def __init__(self, app, sample_rates: Optional[Dict[str, float]] = None,
+                 default_sample_rate: float = 1.0, log_bodies: bool = False,
+                 body_limit: int = 1024):
+        self.app = app
+        self.sample_rates = sorted((sample_rates or {}).items(), key=lambda item: -len(item[0]))
+        self.default_sample_rate = default_sample_rate
+        self.log_bodies = log_bodies
+        self.body_limit = body_limit
+
+    def _sample_rate(self, path: str) -> float:
+        for prefix, rate in self.sample_rates:
+            if path.startswith(prefix):
+                return rate
+        return self.default_sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        path = scope["path"]
+        status_code = 500
+        body = bytearray()
+        capture = (scope["method"] in ("POST", "PUT", "PATCH")
+                   and not path.startswith(SENSITIVE_PATHS))
+
+        async def receive_and_capture():
+            message = await receive()
+            if message["type"] == "http.request" and len(body) < self.body_limit:
+                body.extend(message.get("body", b"")[:self.body_limit - len(body)])
+            return message
+
+        async def send_and_record(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive_and_capture if capture else receive, send_and_record)
+        except Exception:
+            self._log(scope, 500, started, body, exc_info=True)
+            raise
+        self._log(scope, status_code, started, body)
+
+    def _log(self, scope, status_code: int, started: float, body: bytearray, exc_info: bool = False):
+        error = status_code >= 400
+        if not error:
+            rate = self._sample_rate(scope["path"])
+            if rate <= 0 or (rate < 1 and random.random() >= rate):
+                return
+        duration_ms = (time.perf_counter() - started) * 1000
+        fields = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status_code,
+            "duration_ms": round(duration_ms, 2),
+        }
+        if scope.get("query_string"):
+            fields["query"] = scope["query_string"].decode("latin-1")
+        if body and (error or self.log_bodies):
+            fields["body"] = body.decode("utf-8", errors="replace")
+        level = logging.ERROR if status_code >= 500 else logging.WARNING if error else logging.INFO
+        access_logger.log(level, "%s %s %s %.1fms", scope["method"], scope["path"], status_code,
+                          duration_ms, extra={"fields": fields}, exc_info=exc_info)
@@ -0,0 +1,41 @@
+from autocomplete import PrefixIndex
+
+
+def build_index():
+    index = PrefixIndex()
+    index.rebuild([
+        ("company", "ДигиталСофт", 3),
+        ("company", "ЛогистикПро", 2),
+        ("tag", "Быстрая доставка", 1),
+        ("tag", "Доставка", 4),
+        ("tag", "Доставка", 5),
+        ("service", "Доставка на объект", 4),
+    ])
+    return index
+
+
+def test_prefix_matches_any_word_start_case_insensitively():
+    results = build_index().search("ДОСТ")
+    assert results == [
+        {"text": "Доставка", "type": "tag", "count": 2},
+        {"text": "Быстрая доставка", "type": "tag", "count": 1},
+        {"text": "Доставка на объект", "type": "service", "count": 1},
+    ]
+
+
+def test_company_names_carry_their_id():
+    assert build_index().search("диги") == [{"text": "ДигиталСофт", "type": "company", "id": 3}]
+
+
+def test_add_updates_index_incrementally():
+    index = build_index()
+    index.add("company", "Логистика Плюс", 9)
+    index.add("tag", "Доставка", 9)
+    assert [r["text"] for r in index.search("логист")] == ["Логистика Плюс", "ЛогистикПро"]
+    assert index.search("доставка", limit=1) == [{"text": "Доставка", "type": "tag", "count": 3}]
+
+
+def test_empty_or_unknown_prefix():
+    index = build_index()
+    assert index.search("   ") == []
+    assert index.search("zzz") == []
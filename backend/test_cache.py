@@ -0,0 +1,54 @@
+from cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl=30, timer=clock)
+    cache.set("admin", "user")
+    clock.now = 29
+    assert cache.get("admin") == "user"
+    clock.now = 30
+    assert cache.get("admin") is None
+    assert len(cache) == 0
+
+
+def test_per_entry_ttl_cannot_exceed_default():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl=30, timer=clock)
+    cache.set("short", 1, ttl=5)
+    cache.set("long", 2, ttl=300)
+    cache.set("expired", 3, ttl=-1)
+    clock.now = 10
+    assert "short" not in cache
+    assert cache.get("long") == 2
+    assert "expired" not in cache
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_invalidate_and_clear():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.invalidate("a")
+    cache.invalidate("missing")
+    assert "a" not in cache
+    cache.clear()
+    assert len(cache) == 0
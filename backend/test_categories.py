@@ -0,0 +1,53 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi.testclient import TestClient
+
+import main_db
+
+client = TestClient(main_db.app)
+
+
+class FakeConnection:
+    async def fetch(self, query, *args):
+        return [{"id": "it", "name_key": "IT", "icon": "💻"}]
+
+
+class FakePool:
+    @asynccontextmanager
+    async def acquire(self):
+        yield FakeConnection()
+
+
+def test_mock_categories_are_not_cached_long():
+    response = client.get("/categories/")
+    assert response.status_code == 200
+    assert response.json() == main_db.MOCK_CATEGORIES
+    assert response.headers["etag"] == main_db.categories_snapshot.etag
+    assert response.headers["cache-control"] == main_db.MOCK_CATEGORIES_CACHE_CONTROL
+
+
+def test_database_snapshot_gets_long_cache_headers(monkeypatch):
+    monkeypatch.setattr(main_db, "db_pool", FakePool())
+    monkeypatch.setattr(main_db, "categories_snapshot", main_db.categories_snapshot)
+    monkeypatch.setattr(main_db, "categories_cache_control", main_db.categories_cache_control)
+    asyncio.run(main_db.reload_categories_snapshot())
+    response = client.get("/categories/")
+    assert response.json() == [{"id": "it", "nameKey": "IT", "icon": "💻"}]
+    assert response.headers["cache-control"] == main_db.CATEGORIES_CACHE_CONTROL
+
+
+def test_categories_revalidation_returns_304():
+    etag = client.get("/categories/").headers["etag"]
+    response = client.get("/categories/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_reload_requires_admin():
+    user = main_db.User(username="analyst", disabled=False)
+    main_db.app.dependency_overrides[main_db.get_current_user] = lambda: user
+    try:
+        assert client.post("/admin/categories/reload").status_code == 403
+    finally:
+        main_db.app.dependency_overrides.clear()
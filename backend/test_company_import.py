@@ -0,0 +1,82 @@
+import io
+
+from fastapi import UploadFile
+from fastapi.testclient import TestClient
+
+import main
+from main import _is_utf8, _iter_import_rows, _keep_reported_errors, _read_import_chunk
+
+CSV_HEADER = "name,category,description,inn,region,yearFounded,employees,phone,email,website,services,tags\n"
+VALID_CSV_ROW = (
+    'ТехноПром,manufacturing,"Производство, монтаж",7725123456,Москва,2015,100-500,'
+    "+7 (495) 123-45-67,info@technoprom.ru,technoprom.ru,Монтаж|Консультации,Гарантия\n"
+)
+
+
+def upload(content: str, filename: str) -> UploadFile:
+    return UploadFile(io.BytesIO(content.encode("utf-8")), filename=filename)
+
+
+def test_csv_rows_are_validated_and_split():
+    content = CSV_HEADER + VALID_CSV_ROW + "Bad,it,desc,1,Москва,not-a-year,1,2,3,4,,\n"
+    rows = _iter_import_rows(upload(content, "companies.csv"), "csv")
+    valid, errors = _read_import_chunk(rows, {"manufacturing", "it"})
+
+    assert len(valid) == 1
+    row_number, company = valid[0]
+    assert row_number == 2
+    assert company.services == ["Монтаж", "Консультации"]
+    assert company.tags == ["Гарантия"]
+    assert errors == [{"row": 3, "errors": [errors[0]["errors"][0]]}]
+    assert errors[0]["errors"][0].startswith("yearFounded:")
+
+
+def test_ndjson_reports_bad_json_and_unknown_category():
+    content = "\n".join([
+        '{"name": "A", "category": "it", "description": "d", "inn": "1", "region": "r",'
+        ' "yearFounded": 2020, "employees": "1", "phone": "p", "email": "e", "website": "w",'
+        ' "services": []}',
+        "{broken",
+        "",
+        '{"name": "B", "category": "space", "description": "d", "inn": "1", "region": "r",'
+        ' "yearFounded": 2020, "employees": "1", "phone": "p", "email": "e", "website": "w",'
+        ' "services": []}',
+    ])
+    rows = _iter_import_rows(upload(content, "companies.ndjson"), "ndjson")
+    valid, errors = _read_import_chunk(rows, {"it"})
+
+    assert [company.name for _, company in valid] == ["A"]
+    assert [error["row"] for error in errors] == [2, 4]
+    assert errors[0]["errors"][0].startswith("Invalid JSON")
+    assert errors[1]["errors"] == ["category: unknown category 'space'"]
+    assert _read_import_chunk(rows, {"it"}) == ([], [])
+
+
+def test_utf8_check_rewinds_the_upload():
+    file = upload(CSV_HEADER + VALID_CSV_ROW, "companies.csv")
+    assert _is_utf8(file)
+    assert file.file.read(4) == b"name"
+    assert not _is_utf8(UploadFile(io.BytesIO((CSV_HEADER + VALID_CSV_ROW).encode("cp1251")), filename="a.csv"))
+
+
+def test_non_utf8_upload_is_rejected_with_400():
+    user = main.User(username="owner", disabled=False)
+    main.app.dependency_overrides[main.get_current_active_user] = lambda: user
+    try:
+        response = TestClient(main.app).post(
+            "/companies/import",
+            files={"file": ("companies.csv", (CSV_HEADER + VALID_CSV_ROW).encode("cp1251"), "text/csv")},
+        )
+    finally:
+        main.app.dependency_overrides.clear()
+    assert response.status_code == 400
+    assert response.json() == {"detail": "File must be UTF-8 encoded"}
+
+
+def test_reported_errors_stop_growing_at_the_cap(monkeypatch):
+    monkeypatch.setattr(main, "IMPORT_MAX_REPORTED_ERRORS", 3)
+    errors = []
+    _keep_reported_errors(errors, [{"row": 1}, {"row": 2}])
+    _keep_reported_errors(errors, [{"row": 3}, {"row": 4}])
+    _keep_reported_errors(errors, [{"row": 5}])
+    assert errors == [{"row": 1}, {"row": 2}, {"row": 3}]
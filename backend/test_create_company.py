@@ -0,0 +1,84 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+client = TestClient(main.app)
+
+PAYLOAD = {
+    "name": "ТехноПром",
+    "category": "manufacturing",
+    "description": "Производство",
+    "inn": "7725123456",
+    "region": "Москва",
+    "yearFounded": 2015,
+    "employees": "100-500",
+    "phone": "+7 (495) 123-45-67",
+    "email": "info@technoprom.ru",
+    "website": "technoprom.ru",
+    "services": ["Монтаж", "Консультации"],
+    "tags": ["Гарантия"],
+}
+
+
+class FakeDatabase:
+    def __init__(self, fail=False, company_id=42):
+        self.fail = fail
+        self.company_id = company_id
+        self.calls = []
+
+    async def fetch_val(self, query, values=None):
+        self.calls.append(("fetch_val", query, values))
+        if self.fail:
+            raise ConnectionError("database is down")
+        return self.company_id
+
+    async def fetch_one(self, query, values=None):
+        self.calls.append(("fetch_one", query, values))
+        card = dict(PAYLOAD)
+        card.update(id=values["company_id"], rating=0, reviewsCount=0, verified=False,
+                    logo="", completedDeals=0, responseTime="", reviews=[])
+        return {"card": card}
+
+
+@pytest.fixture
+def owner():
+    user = main.User(username="owner", disabled=False)
+    main.app.dependency_overrides[main.get_current_active_user] = lambda: user
+    yield
+    main.app.dependency_overrides.clear()
+
+
+def test_company_is_written_in_one_statement(monkeypatch, owner):
+    fake = FakeDatabase()
+    monkeypatch.setattr(main, "database", fake)
+
+    response = client.post("/companies/", json=PAYLOAD)
+
+    assert response.status_code == 200
+    assert response.json()["id"] == 42
+    assert response.json()["services"] == ["Монтаж", "Консультации"]
+    (method, query, values), read = fake.calls
+    assert method == "fetch_val" and query == main.CREATE_COMPANY_QUERY
+    assert values["username"] == "owner"
+    assert values["category_id"] == "manufacturing"
+    assert values["services"] == ["Монтаж", "Консультации"]
+    assert values["tags"] == ["Гарантия"]
+    assert read[2] == {"company_id": 42}
+
+
+def test_failed_insert_returns_500(monkeypatch, owner):
+    monkeypatch.setattr(main, "database", FakeDatabase(fail=True))
+    response = client.post("/companies/", json=PAYLOAD)
+    assert response.status_code == 500
+    assert response.json() == {"detail": "Company creation failed"}
+
+
+def test_missing_owner_inserts_nothing_and_returns_401(monkeypatch, owner):
+    # The owner is joined in the CTE instead of a NULL-able scalar subquery
+    assert "FROM owner" in main.CREATE_COMPANY_QUERY
+    fake = FakeDatabase(company_id=None)
+    monkeypatch.setattr(main, "database", fake)
+    response = client.post("/companies/", json=PAYLOAD)
+    assert response.status_code == 401
+    assert [call[0] for call in fake.calls] == ["fetch_val"]
@@ -0,0 +1,126 @@
+import asyncio
+import io
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+from export import COPY_QUEUE_SIZE, stream_copy_csv, stream_parquet
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def fetch(self, n):
+        batch, self.rows = self.rows[:n], self.rows[n:]
+        return batch
+
+
+class FakeStatement:
+    def __init__(self, columns, rows):
+        self.columns = columns
+        self.rows = rows
+
+    def get_attributes(self):
+        return [SimpleNamespace(name=name, type=SimpleNamespace(name=type_name))
+                for name, type_name in self.columns]
+
+    async def cursor(self, *args):
+        return FakeCursor(list(self.rows))
+
+
+class FakeConnection:
+    def __init__(self, chunks=(), fail_after=None, statement=None, numeric_columns=()):
+        self.chunks = chunks
+        self.fail_after = fail_after
+        self.statement = statement
+        self.numeric_columns = numeric_columns
+        self.copy_calls = []
+        self.fetch_calls = []
+
+    async def fetch(self, query, *args):
+        self.fetch_calls.append(args)
+        return [{"column_name": name, "numeric_precision": precision, "numeric_scale": scale}
+                for name, precision, scale in self.numeric_columns]
+
+    async def copy_from_query(self, query, *args, output, format, header):
+        self.copy_calls.append((query, format, header))
+        for index, chunk in enumerate(self.chunks):
+            if index == self.fail_after:
+                raise ConnectionError("connection lost")
+            await output(chunk)
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+    async def prepare(self, query):
+        return self.statement
+
+
+class FakePool:
+    def __init__(self, connection):
+        self.connection = connection
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.connection
+
+
+async def collect(stream):
+    return [chunk async for chunk in stream]
+
+
+def test_copy_chunks_are_streamed_in_order():
+    chunks = [b"id,name\n"] + [f"{i},c{i}\n".encode() for i in range(COPY_QUEUE_SIZE * 3)]
+    connection = FakeConnection(chunks)
+
+    received = asyncio.run(collect(stream_copy_csv(FakePool(connection), "SELECT 1")))
+
+    assert received == chunks
+    assert connection.copy_calls == [("SELECT 1", "csv", True)]
+
+
+def test_copy_error_is_raised_after_partial_output():
+    connection = FakeConnection([b"id\n", b"1\n", b"2\n"], fail_after=2)
+
+    async def run():
+        received = []
+        with pytest.raises(ConnectionError):
+            async for chunk in stream_copy_csv(FakePool(connection), "SELECT 1"):
+                received.append(chunk)
+        return received
+
+    assert asyncio.run(run()) == [b"id\n", b"1\n"]
+
+
+def test_parquet_export_writes_one_row_group_per_batch():
+    pq = pytest.importorskip("pyarrow.parquet")
+    created = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    amount = Decimal("1234567890123.45")
+    rows = [(i, f"Company {i}", amount if i % 2 else None, Decimal("0.125"), created) for i in range(5)]
+    statement = FakeStatement(
+        [("id", "int4"), ("name", "varchar"), ("investment_amount", "numeric"),
+         ("ratio", "numeric"), ("created_at", "timestamptz")],
+        rows,
+    )
+    connection = FakeConnection(statement=statement, numeric_columns=[("investment_amount", 15, 2)])
+
+    data = b"".join(asyncio.run(collect(
+        stream_parquet(FakePool(connection), "SELECT 1", batch_size=2, table="investment_proposals")
+    )))
+
+    parquet_file = pq.ParquetFile(io.BytesIO(data))
+    assert parquet_file.metadata.num_row_groups == 3
+    table = parquet_file.read()
+    assert table.column("id").to_pylist() == [0, 1, 2, 3, 4]
+    assert connection.fetch_calls == [("investment_proposals",)]
+    assert str(table.schema.field("investment_amount").type) == "decimal128(15, 2)"
+    assert table.column("investment_amount").to_pylist() == [None, amount, None, amount, None]
+    assert str(table.column("investment_amount").to_pylist()[1]) == "1234567890123.45"
+    # NUMERIC without a declared scale is kept exact as text
+    assert table.column("ratio").to_pylist() == ["0.125"] * 5
+    assert table.column("created_at").to_pylist()[0] == created
@@ -0,0 +1,88 @@
+import json
+from contextlib import asynccontextmanager
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main_db
+
+client = TestClient(main_db.app)
+
+COMPANY_ROWS = [
+    {"facet": "category_id", "value": "it", "count": 3},
+    {"facet": "category_id", "value": "logistics", "count": 1},
+    {"facet": "region", "value": "Москва", "count": 4},
+]
+
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def fetch(self, query, *args):
+        self.pool.queries.append(query)
+        rows = self.pool.rows.get(query, [])
+        if self.pool.during_fetch is not None:
+            self.pool.during_fetch()
+        return rows
+
+
+class FakePool:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+        self.during_fetch = None
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield FakeConnection(self)
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = FakePool({main_db.COMPANY_FACETS_QUERY: COMPANY_ROWS})
+    monkeypatch.setattr(main_db, "db_pool", pool)
+    # Stale replica: cache fills must never read from it
+    monkeypatch.setattr(main_db, "read_db", FakePool({main_db.COMPANY_FACETS_QUERY: []}))
+    main_db.facets_cache.clear()
+    yield pool
+    main_db.facets_cache.clear()
+
+
+def test_grouping_rows_are_shaped_into_buckets(pool):
+    response = client.get("/companies/facets")
+    assert response.status_code == 200
+    assert response.json() == {
+        "category_id": [{"value": "it", "count": 3}, {"value": "logistics", "count": 1}],
+        "region": [{"value": "Москва", "count": 4}],
+        "verified": [],
+    }
+    assert pool.queries == [main_db.COMPANY_FACETS_QUERY]
+
+
+def test_second_request_is_served_from_cache(pool):
+    first = client.get("/companies/facets").json()
+    assert client.get("/companies/facets").json() == first
+    assert len(pool.queries) == 1
+
+
+def test_invalidation_notice_drops_only_that_table(pool):
+    client.get("/companies/facets")
+    client.get("/investment-proposals/facets")
+    main_db.cache_invalidation.dispatch(json.dumps({"table": "companies"}))
+    client.get("/companies/facets")
+    client.get("/investment-proposals/facets")
+    assert pool.queries == [
+        main_db.COMPANY_FACETS_QUERY,
+        main_db.PROPOSAL_FACETS_QUERY,
+        main_db.COMPANY_FACETS_QUERY,
+    ]
+
+
+def test_load_racing_an_invalidation_is_not_cached(pool):
+    # A write commits and invalidates while the load is still reading old counts
+    pool.during_fetch = lambda: main_db.cache_invalidation.dispatch(json.dumps({"table": "companies"}))
+    client.get("/companies/facets")
+    pool.during_fetch = None
+    client.get("/companies/facets")
+    assert pool.queries == [main_db.COMPANY_FACETS_QUERY, main_db.COMPANY_FACETS_QUERY]
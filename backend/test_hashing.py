@@ -0,0 +1,58 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from hashing import PasswordHasher
+
+
+class BlockingContext:
+    """Stand-in for CryptContext whose verify() waits until released."""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def verify(self, plain_password, hashed_password):
+        self.release.wait(timeout=5)
+        return plain_password == hashed_password
+
+    def hash(self, password):
+        return password
+
+
+def test_verify_runs_in_worker_pool():
+    context = BlockingContext()
+    context.release.set()
+    hasher = PasswordHasher(context, max_workers=1, queue_limit=0)
+
+    async def run():
+        return await hasher.verify("secret", "secret"), await hasher.hash("secret")
+
+    try:
+        assert asyncio.run(run()) == (True, "secret")
+    finally:
+        hasher.shutdown()
+
+
+def test_rejects_with_503_when_queue_is_full():
+    context = BlockingContext()
+    hasher = PasswordHasher(context, max_workers=1, queue_limit=1)
+
+    async def run():
+        running = [asyncio.create_task(hasher.verify("a", "a")) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert hasher.pending == 2
+        with pytest.raises(HTTPException) as exc_info:
+            await hasher.verify("a", "a")
+        context.release.set()
+        return exc_info.value, await asyncio.gather(*running)
+
+    try:
+        error, results = asyncio.run(run())
+    finally:
+        hasher.shutdown()
+    assert error.status_code == 503
+    assert error.headers == {"Retry-After": "1"}
+    assert results == [True, True]
+    assert hasher.pending == 0
@@ -0,0 +1,53 @@
+import asyncio
+import json
+
+from cache import TTLCache
+from invalidation import InvalidationListener
+
+
+def make_listener():
+    listener = InvalidationListener("postgresql://unused", reconnect_delay=3600)
+    users = TTLCache(ttl=60)
+    facets = TTLCache(ttl=60)
+    listener.register("users", lambda key: users.clear() if key is None else users.invalidate(key))
+    listener.register("companies", lambda key: facets.invalidate("companies"))
+    users.set("alice", 1)
+    users.set("bob", 2)
+    facets.set("companies", {})
+    facets.set("investment_proposals", {})
+    return listener, users, facets
+
+
+def test_row_key_invalidates_only_that_entry():
+    listener, users, facets = make_listener()
+    listener.dispatch(json.dumps({"table": "users", "key": "alice"}))
+    assert "alice" not in users
+    assert "bob" in users
+    assert "companies" in facets
+
+
+def test_statement_notice_reaches_table_handlers():
+    listener, users, facets = make_listener()
+    listener.dispatch(json.dumps({"table": "companies", "key": None}))
+    assert "companies" not in facets
+    assert "investment_proposals" in facets
+    assert len(users) == 2
+
+
+def test_malformed_and_unknown_notices_are_ignored():
+    listener, users, facets = make_listener()
+    listener.dispatch("not json")
+    listener.dispatch(json.dumps({"table": "reviews", "key": None}))
+    assert len(users) == 2 and len(facets) == 2
+
+
+def test_lost_connection_drops_every_cache():
+    listener, users, facets = make_listener()
+
+    async def run():
+        listener._on_termination(None)
+        await listener.stop()
+
+    asyncio.run(run())
+    assert len(users) == 0
+    assert "companies" not in facets
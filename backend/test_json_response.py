@@ -0,0 +1,78 @@
+import json
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from fastapi import FastAPI
+from fastapi.datastructures import Default
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from json_response import FastJSONResponse, dumps
+
+ROW = {
+    "id": 7,
+    "title": "Раунд",
+    "investment_amount": Decimal("5000000.00"),
+    "views_count": Decimal("12"),
+    "funding_deadline": date(2025, 12, 31),
+    "created_at": datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+    "max_investment": None,
+}
+
+
+class Item(BaseModel):
+    name: str
+    price: Decimal
+
+
+app = FastAPI(default_response_class=Default(FastJSONResponse))
+
+
+@app.get("/rows/")
+async def rows():
+    return FastJSONResponse([ROW], headers={"X-Next-Cursor": "abc"})
+
+
+@app.get("/item/", response_model=Item)
+async def item():
+    return Item(name="Тест", price=Decimal("1.50"))
+
+
+@app.get("/plain/")
+async def plain():
+    return {"created_at": ROW["created_at"]}
+
+
+client = TestClient(app)
+
+
+def test_same_json_as_jsonable_encoder():
+    assert json.loads(dumps(ROW)) == jsonable_encoder(ROW)
+
+
+def test_decimal_keeps_int_or_float():
+    assert dumps([Decimal("12"), Decimal("4.5"), Decimal("1E+2")]) == b"[12,4.5,100]"
+
+
+def test_models_and_sets():
+    assert json.loads(dumps({"item": Item(name="a", price=Decimal("2")), "tags": {"x"}})) == {
+        "item": {"name": "a", "price": 2},
+        "tags": ["x"],
+    }
+
+
+def test_non_ascii_is_not_escaped():
+    assert dumps({"title": "Раунд"}) == '{"title":"Раунд"}'.encode()
+
+
+def test_endpoint_response():
+    response = client.get("/rows/")
+    assert response.headers["content-type"] == "application/json"
+    assert response.headers["x-next-cursor"] == "abc"
+    assert response.json() == [jsonable_encoder(ROW)]
+
+
+def test_default_response_class():
+    assert client.get("/item/").json() == {"name": "Тест", "price": "1.50"}
+    assert client.get("/plain/").json() == {"created_at": "2025-01-02T03:04:05+00:00"}
@@ -0,0 +1,56 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from metrics import MetricsMiddleware, metrics_response, track_query
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def make_client():
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        with track_query("get_item"):
+            return {"id": item_id}
+
+    @app.get("/metrics")
+    async def get_metrics():
+        return metrics_response()
+
+    app.add_middleware(MetricsMiddleware)
+    return TestClient(app)
+
+
+def test_requests_are_counted_per_route_template():
+    client = make_client()
+    labels = {"method": "GET", "route": "/items/{item_id}", "status": "200"}
+    before = sample("http_requests_total", **labels)
+
+    client.get("/items/1")
+    client.get("/items/2")
+
+    assert sample("http_requests_total", **labels) == before + 2
+    assert sample("http_request_duration_seconds_count", method="GET", route="/items/{item_id}") >= 2
+    assert sample("db_query_duration_seconds_count", query="get_item") >= 2
+    assert sample("http_requests_in_flight", method="GET") == 0
+
+
+def test_unknown_paths_share_one_series():
+    client = make_client()
+    labels = {"method": "GET", "route": "unmatched", "status": "404"}
+    before = sample("http_requests_total", **labels)
+    client.get("/wp-login.php")
+    client.get("/.env")
+    assert sample("http_requests_total", **labels) == before + 2
+
+
+def test_metrics_endpoint_uses_prometheus_text_format():
+    client = make_client()
+    client.get("/items/1")
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_requests_total{method="GET",route="/items/{item_id}",status="200"}' in response.text
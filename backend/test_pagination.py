@@ -0,0 +1,33 @@
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 11, 15, 10, 30, tzinfo=timezone.utc)
+    cursor = encode_cursor({"created_at": created_at, "id": 42})
+    assert "=" not in cursor
+    assert decode_cursor(cursor, "created_at", "id") == {"created_at": created_at, "id": 42}
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor({"other": 1}), "W10"])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor(cursor, "id")
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.parametrize("values, keys", [
+    ({"id": "abc"}, ("id",)),
+    ({"id": True}, ("id",)),
+    ({"id": 1.5}, ("id",)),
+    ({"created_at": 5, "id": 1}, ("created_at", "id")),
+    ({"created_at": "2024-01-01", "id": 1}, ("created_at", "id")),
+])
+def test_cursor_values_are_type_checked(values, keys):
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor(encode_cursor(values), *keys)
+    assert exc_info.value.status_code == 400
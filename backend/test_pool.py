@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from pool import InstrumentedPool, pool_options_from_env
+
+
+class FakeAsyncpgPool:
+    def __init__(self, size=2):
+        self.free = [f"conn{i}" for i in range(size)]
+        self.size = size
+        self.released = []
+
+    async def acquire(self, timeout=None):
+        if not self.free:
+            await asyncio.sleep(timeout)
+            raise asyncio.TimeoutError()
+        return self.free.pop()
+
+    async def release(self, connection):
+        self.released.append(connection)
+        self.free.append(connection)
+
+    def get_min_size(self):
+        return 1
+
+    def get_max_size(self):
+        return self.size
+
+    def get_size(self):
+        return self.size
+
+    def get_idle_size(self):
+        return len(self.free)
+
+
+def test_acquire_tracks_connections_in_use():
+    pool = InstrumentedPool(FakeAsyncpgPool())
+
+    async def run():
+        async with pool.acquire() as connection:
+            assert pool.stats()["acquired"] == 1
+            assert pool.stats()["idle"] == 1
+        return connection
+
+    connection = asyncio.run(run())
+    stats = pool.stats()
+    assert stats["acquired"] == 0
+    assert stats["acquires_total"] == 1
+    assert pool.released == [connection]
+
+
+def test_exhausted_pool_times_out_and_is_counted():
+    pool = InstrumentedPool(FakeAsyncpgPool(size=1), acquire_timeout=0.01)
+
+    async def run():
+        async with pool.acquire():
+            with pytest.raises(asyncio.TimeoutError):
+                async with pool.acquire():
+                    pass
+
+    asyncio.run(run())
+    stats = pool.stats()
+    assert stats["timeouts_total"] == 1
+    assert stats["wait_seconds_max"] >= 0.01
+
+
+def test_pool_options_are_read_from_env(monkeypatch):
+    monkeypatch.setenv("DB_POOL_MAX_SIZE", "25")
+    monkeypatch.setenv("DB_STATEMENT_CACHE_SIZE", "0")
+    monkeypatch.setenv("DB_COMMAND_TIMEOUT", "0")
+    options = pool_options_from_env()
+    assert options["max_size"] == 25
+    assert options["statement_cache_size"] == 0
+    assert options["command_timeout"] is None
@@ -0,0 +1,121 @@
+import logging
+from contextlib import asynccontextmanager
+from typing import List
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from profiling import ProfiledRoute, ProfilingMiddleware, fingerprint, profiled
+
+
+class FakeConnection:
+    async def fetch(self, query, *args):
+        return [{"id": 1}, {"id": 2}]
+
+    async def fetchrow(self, query, *args):
+        return {"id": args[0]}
+
+    def cursor(self, query, *args):
+        return FakeCursorFactory()
+
+    async def copy_records_to_table(self, table_name, *, records, columns=None):
+        return f"COPY {len(records)}"
+
+
+class FakeCursor:
+    def __init__(self):
+        self.batches = [[{"id": 1}, {"id": 2}], [{"id": 3}], []]
+
+    async def fetch(self, n):
+        return self.batches.pop(0)
+
+
+class FakeCursorFactory:
+    def __await__(self):
+        async def open_cursor():
+            return FakeCursor()
+        return open_cursor().__await__()
+
+
+class FakePool:
+    @asynccontextmanager
+    async def acquire(self):
+        yield profiled(FakeConnection())
+
+
+class Item(BaseModel):
+    id: int
+
+
+def make_client(query_threshold=10):
+    app = FastAPI()
+    app.router.route_class = ProfiledRoute
+    pool = FakePool()
+
+    @app.get("/items/", response_model=List[Item])
+    async def list_items(limit: int = 10):
+        async with pool.acquire() as connection:
+            rows = await connection.fetch("SELECT id FROM items LIMIT $1", limit)
+            for row in rows:
+                await connection.fetchrow("SELECT id FROM items WHERE id = $1", row["id"])
+        return rows
+
+    app.add_middleware(ProfilingMiddleware, query_threshold=query_threshold)
+    return TestClient(app)
+
+
+def test_server_timing_header_splits_request_phases():
+    response = make_client().get("/items/?limit=2")
+    assert response.json() == [{"id": 1}, {"id": 2}]
+    timing = response.headers["server-timing"]
+    for phase in ("db;dur=", 'desc="3 queries"', "serialize;dur=", "app;dur=", "total;dur="):
+        assert phase in timing
+
+
+def test_repeated_queries_are_reported_as_n_plus_one(caplog):
+    with caplog.at_level(logging.INFO, logger="profiling"):
+        make_client(query_threshold=2).get("/items/")
+    records = [r for r in caplog.records if r.name == "profiling"]
+    [profile] = [r for r in records if r.levelno == logging.INFO]
+    assert profile.fields["queries"] == 3
+    assert profile.fields["query_breakdown"][0]["rows"] in (1, 2)
+    [warning] = [r for r in records if r.levelno == logging.WARNING]
+    assert "2x SELECT id FROM items WHERE id = $1" in warning.getMessage()
+
+
+def test_connections_are_untouched_outside_profiled_requests():
+    connection = FakeConnection()
+    assert profiled(connection) is connection
+
+
+def test_fingerprint_strips_literals_but_keeps_placeholders():
+    sql = "SELECT *\n  FROM companies WHERE id = 42 AND name = 'O''Neil' AND region = $1"
+    assert fingerprint(sql) == "SELECT * FROM companies WHERE id = ? AND name = ? AND region = $1"
+
+
+def test_cursor_batches_and_copy_are_profiled(caplog):
+    app = FastAPI()
+    pool = FakePool()
+
+    async def stream():
+        async with pool.acquire() as connection:
+            await connection.copy_records_to_table("items", records=[(1,), (2,)], columns=["id"])
+            cursor = await connection.cursor("SELECT id FROM items")
+            while rows := await cursor.fetch(2):
+                yield b"".join(b"%d\n" % row["id"] for row in rows)
+
+    @app.get("/items/stream")
+    async def stream_items():
+        return StreamingResponse(stream(), media_type="text/plain")
+
+    app.add_middleware(ProfilingMiddleware)
+    with caplog.at_level(logging.INFO, logger="profiling"):
+        assert TestClient(app).get("/items/stream").text == "1\n2\n3\n"
+    [profile] = [r for r in caplog.records if r.name == "profiling"]
+    breakdown = {entry["sql"]: entry for entry in profile.fields["query_breakdown"]}
+    assert profile.fields["queries"] == 2
+    assert breakdown["SELECT id FROM items"]["count"] == 1
+    assert breakdown["SELECT id FROM items"]["rows"] == 3
+    assert breakdown["COPY items FROM STDIN"]["rows"] == 2
@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from json_response import dumps
+from read_models import CompanyCard, ReviewCard
+
+CARD = {
+    "id": 1,
+    "name": "ООО Тест",
+    "category": "manufacturing",
+    "description": "Описание",
+    "rating": 4.5,
+    "reviewsCount": 1,
+    "verified": True,
+    "inn": "7700000001",
+    "region": "Москва",
+    "yearFounded": 2010,
+    "employees": "10-50",
+    "tags": ["b2b"],
+    "logo": "🏭",
+    "phone": "+7 495 000-00-00",
+    "email": "info@example.ru",
+    "website": "https://example.ru",
+    "completedDeals": 12,
+    "responseTime": "1 час",
+    "services": ["Монтаж"],
+    "reviews": [{"id": 5, "author": "Иван", "rating": 5, "text": "Хорошо", "date": "2024-05-01"}],
+}
+
+
+def test_from_card_serializes_to_api_shape():
+    company = CompanyCard.from_card(CARD)
+    assert company.reviews == [ReviewCard(5, "Иван", 5, "Хорошо", "2024-05-01")]
+    assert json.loads(dumps(company)) == CARD
+
+
+def test_extra_keys_are_dropped_and_missing_keys_fail():
+    company = CompanyCard.from_card({**CARD, "internal": "x"})
+    assert "internal" not in json.loads(dumps(company))
+    with pytest.raises(KeyError):
+        CompanyCard.from_card({key: value for key, value in CARD.items() if key != "name"})
+
+
+def test_cards_have_no_instance_dict():
+    assert not hasattr(CompanyCard.from_card(CARD), "__dict__")
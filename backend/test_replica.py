@@ -0,0 +1,84 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from replica import REPLICA_LAG_QUERY, ReplicaRouter
+
+
+class FakeConnection:
+    def __init__(self, name, lag=0.0):
+        self.name = name
+        self.lag = lag
+
+    async def fetchval(self, query):
+        return self.lag
+
+
+class FakePool:
+    def __init__(self, name, lag=0.0, down=False):
+        self.connection = FakeConnection(name, lag)
+        self.down = down
+
+    @asynccontextmanager
+    async def acquire(self):
+        if self.down:
+            raise ConnectionRefusedError("replica is down")
+        yield self.connection
+
+
+async def reader_name(router):
+    async with router.acquire() as connection:
+        return connection.name
+
+
+def test_reads_go_to_healthy_replica():
+    router = ReplicaRouter(FakePool("primary"), FakePool("replica"))
+    assert asyncio.run(reader_name(router)) == "replica"
+
+
+def test_reads_use_primary_without_replica():
+    router = ReplicaRouter(FakePool("primary"))
+    assert asyncio.run(reader_name(router)) == "primary"
+
+
+def test_failed_replica_acquire_falls_back_to_primary():
+    replica = FakePool("replica", down=True)
+    router = ReplicaRouter(FakePool("primary"), replica)
+
+    assert asyncio.run(reader_name(router)) == "primary"
+    assert not router.healthy
+
+    # The next health check brings the replica back into rotation
+    replica.down = False
+    asyncio.run(router.check())
+    assert asyncio.run(reader_name(router)) == "replica"
+
+
+def test_lagging_replica_is_skipped():
+    replica = FakePool("replica", lag=30.0)
+    router = ReplicaRouter(FakePool("primary"), replica, max_lag=10.0)
+
+    asyncio.run(router.check())
+    assert router.lag == 30.0
+    assert asyncio.run(reader_name(router)) == "primary"
+
+    replica.connection.lag = 1.0
+    asyncio.run(router.check())
+    assert asyncio.run(reader_name(router)) == "replica"
+
+
+def test_disconnected_wal_receiver_falls_back_to_primary():
+    # Only a streaming receiver may report 0; otherwise the replay age counts
+    assert "status = 'streaming'" in REPLICA_LAG_QUERY
+    replica = FakePool("replica")
+    router = ReplicaRouter(FakePool("primary"), replica, max_lag=10.0)
+
+    # Receiver gone and the primary kept writing: replay age grows past max_lag
+    replica.connection.lag = 120.0
+    asyncio.run(router.check())
+    assert asyncio.run(reader_name(router)) == "primary"
+
+    # Nothing replayed at all: the query yields NULL
+    replica.connection.lag = None
+    asyncio.run(router.check())
+    assert router.lag is None and not router.healthy
+    assert asyncio.run(reader_name(router)) == "primary"
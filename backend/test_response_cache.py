@@ -0,0 +1,63 @@
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from response_cache import ResponseCache, etag_matches
+
+app = FastAPI()
+cache = ResponseCache(ttl=60)
+calls = []
+
+
+@app.get("/items/")
+async def list_items(request: Request, page: int = 0):
+    cached = cache.lookup(request)
+    if cached is not None:
+        return cached
+    calls.append(page)
+    return cache.store(request, [{"page": page, "name": "Тест"}], {"X-Next-Cursor": "abc"})
+
+
+client = TestClient(app)
+
+
+def setup_function():
+    cache.clear()
+    calls.clear()
+
+
+def test_hit_serves_same_bytes_without_recomputing():
+    first = client.get("/items/?page=1")
+    second = client.get("/items/?page=1")
+    assert first.json() == [{"page": 1, "name": "Тест"}]
+    assert second.content == first.content
+    assert second.headers["etag"] == first.headers["etag"]
+    assert second.headers["x-next-cursor"] == "abc"
+    assert calls == [1]
+
+
+def test_query_string_is_part_of_the_key():
+    client.get("/items/?page=1")
+    client.get("/items/?page=2")
+    assert calls == [1, 2]
+
+
+def test_matching_if_none_match_returns_304():
+    etag = client.get("/items/").headers["etag"]
+    response = client.get("/items/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+
+def test_clear_forces_a_fresh_response():
+    client.get("/items/")
+    cache.clear()
+    client.get("/items/")
+    assert calls == [0, 0]
+
+
+def test_etag_matching():
+    assert etag_matches('"a", W/"b"', '"b"')
+    assert etag_matches("*", '"b"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"b"')
@@ -0,0 +1,54 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+client = TestClient(main.app)
+
+CARD = {
+    "id": 1, "name": "ООО Тест", "category": "manufacturing", "description": "Оборудование",
+    "rating": 4.5, "reviewsCount": 0, "verified": True, "inn": "7700000001", "region": "Москва",
+    "yearFounded": 2010, "employees": "10-50", "tags": [], "logo": "", "phone": "", "email": "",
+    "website": "", "completedDeals": 0, "responseTime": "", "services": [], "reviews": [],
+}
+
+
+class FakeDatabase:
+    def __init__(self, cards):
+        self.cards = cards
+        self.calls = []
+
+    async def fetch_all(self, query, values=None):
+        self.calls.append((query, values))
+        return [{"card": card} for card in self.cards]
+
+
+@pytest.fixture
+def database(monkeypatch):
+    fake = FakeDatabase([{**CARD, "id": 2, "name": "Монтаж"}, CARD])
+    monkeypatch.setattr(main, "database", fake)
+    main.company_response_cache.clear()
+    yield fake
+    main.company_response_cache.clear()
+
+
+def test_blank_query_returns_empty_list_without_querying(database):
+    response = client.get("/companies/search", params={"q": "   "})
+    assert response.status_code == 200
+    assert response.json() == []
+    assert database.calls == []
+
+
+def test_search_uses_both_text_configs_and_keeps_rank_order(database):
+    response = client.get("/companies/search", params={"q": "монтаж оборудования", "skip": 10, "limit": 5})
+    assert [company["id"] for company in response.json()] == [2, 1]
+    [(query, values)] = database.calls
+    assert "websearch_to_tsquery('russian', :q) || websearch_to_tsquery('english', :q)" in query
+    assert "ORDER BY ts_rank(search_vector, tsq.query) DESC, company_id" in query
+    assert values == {"q": "монтаж оборудования", "skip": 10, "limit": 5}
+
+
+def test_limit_and_skip_are_clamped(database):
+    client.get("/companies/search", params={"q": "a", "skip": -5, "limit": 1000000})
+    client.get("/companies/search", params={"q": "b", "limit": 0})
+    assert [values["limit"] for _, values in database.calls] == [50, 1]
+    assert database.calls[0][1]["skip"] == 0
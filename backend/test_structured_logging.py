@@ -0,0 +1,95 @@
+import json
+import logging
+import queue
+
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from structured_logging import JsonFormatter, RecordQueueHandler, RequestLoggingMiddleware
+
+
+def make_client(**options):
+    app = FastAPI()
+
+    @app.get("/companies/")
+    async def list_companies():
+        return []
+
+    @app.post("/companies/")
+    async def create_company(company: dict):
+        raise HTTPException(status_code=400, detail="Invalid company")
+
+    @app.post("/token")
+    async def login(form: dict):
+        raise HTTPException(status_code=401, detail="Incorrect username or password")
+
+    app.add_middleware(RequestLoggingMiddleware, **options)
+    return TestClient(app)
+
+
+def access_records(caplog):
+    return [record for record in caplog.records if record.name == "access"]
+
+
+def test_successful_requests_are_sampled_per_route(caplog):
+    client = make_client(sample_rates={"/companies/": 0.0})
+    with caplog.at_level(logging.INFO, logger="access"):
+        client.get("/companies/")
+    assert access_records(caplog) == []
+
+
+def test_errors_are_always_logged_with_body(caplog):
+    client = make_client(default_sample_rate=0.0)
+    with caplog.at_level(logging.INFO, logger="access"):
+        client.post("/companies/", json={"name": "ООО Ромашка"})
+    [record] = access_records(caplog)
+    assert record.levelno == logging.WARNING
+    assert record.fields["status"] == 400
+    assert json.loads(record.fields["body"]) == {"name": "ООО Ромашка"}
+
+
+def test_body_is_not_logged_on_success_by_default(caplog):
+    client = make_client()
+    with caplog.at_level(logging.INFO, logger="access"):
+        client.get("/companies/?limit=5")
+    [record] = access_records(caplog)
+    assert record.fields["query"] == "limit=5"
+    assert "body" not in record.fields
+
+
+def test_credentials_are_never_logged(caplog):
+    client = make_client(log_bodies=True)
+    with caplog.at_level(logging.INFO, logger="access"):
+        client.post("/token", json={"username": "admin", "password": "secret"})
+    [record] = access_records(caplog)
+    assert "body" not in record.fields
+
+
+def test_json_formatter_flattens_fields():
+    record = logging.LogRecord("access", logging.INFO, __file__, 1, "%s %s", ("GET", "/"), None)
+    record.fields = {"status": 200, "duration_ms": 1.5}
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == "GET /"
+    assert entry["status"] == 200
+    assert entry["level"] == "INFO"
+
+
+def test_queued_exception_is_formatted_by_the_listener_as_its_own_field():
+    log_queue = queue.SimpleQueue()
+    logger = logging.getLogger("queued")
+    logger.propagate = False
+    logger.addHandler(RecordQueueHandler(log_queue))
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("failed %s", "export")
+    finally:
+        logger.handlers.clear()
+        logger.propagate = True
+
+    record = log_queue.get_nowait()
+    # Nothing was formatted on the logging thread
+    assert record.exc_text is None and record.args is None
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == "failed export"
+    assert "ValueError: boom" in entry["exc_info"]
@@ -0,0 +1,92 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from view_counter import ViewCounterBuffer
+
+
+class FakeConnection:
+    def __init__(self, fail=False, delay=0):
+        self.fail = fail
+        self.delay = delay
+        self.calls = []
+
+    async def execute(self, query, *args):
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("database is down")
+        self.calls.append(args)
+
+
+class FakePool:
+    def __init__(self, connection):
+        self.connection = connection
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.connection
+
+
+def test_views_are_aggregated_into_one_batched_update():
+    connection = FakeConnection()
+    counter = ViewCounterBuffer()
+    for proposal_id in [1, 2, 1, 1]:
+        counter.increment(proposal_id)
+    assert counter.pending(1) == 3
+
+    asyncio.run(counter.flush(FakePool(connection)))
+
+    assert connection.calls == [([1, 2], [3, 1])]
+    assert counter.pending(1) == 0
+
+
+def test_failed_flush_keeps_views_for_retry():
+    counter = ViewCounterBuffer()
+    counter.increment(7)
+    asyncio.run(counter.flush(FakePool(FakeConnection(fail=True))))
+    assert counter.pending(7) == 1
+
+
+def test_stop_flushes_remaining_views():
+    connection = FakeConnection()
+    counter = ViewCounterBuffer(interval=3600)
+
+    async def run():
+        counter.start(FakePool(connection))
+        counter.increment(5, views=2)
+        await counter.stop()
+
+    asyncio.run(run())
+    assert connection.calls == [([5], [2])]
+
+
+def test_cancelled_flush_keeps_views():
+    counter = ViewCounterBuffer()
+    counter.increment(3, views=4)
+
+    async def run():
+        flush = asyncio.create_task(counter.flush(FakePool(FakeConnection(delay=10))))
+        await asyncio.sleep(0.01)
+        flush.cancel()
+        try:
+            await flush
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(run())
+    assert counter.pending(3) == 4
+
+
+def test_stop_waits_for_running_flush():
+    connection = FakeConnection(delay=0.05)
+    counter = ViewCounterBuffer(interval=0.01)
+
+    async def run():
+        counter.start(FakePool(connection))
+        counter.increment(1)
+        # The periodic flush is now inside the slow execute
+        await asyncio.sleep(0.03)
+        counter.increment(2)
+        await counter.stop()
+
+    asyncio.run(run())
+    assert connection.calls == [([1], [1]), ([2], [1])]
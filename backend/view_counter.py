@@ -0,0 +1,76 @@
+import asyncio
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+FLUSH_QUERY = """
+    UPDATE investment_proposals AS ip
+    SET views_count = ip.views_count + v.views
+    FROM unnest($1::int[], $2::int[]) AS v(id, views)
+    WHERE ip.id = v.id
+"""
+
+
+class ViewCounterBuffer:
+    """Write-behind buffer for investment proposal view counts.
+
+    Reads only bump an in-memory counter; a background task adds the
+    accumulated deltas to the table in one batched UPDATE every
+    ``interval`` seconds and once more on shutdown. All access happens on
+    the event loop thread, so a plain dict needs no locking or sharding.
+    """
+
+    def __init__(self, interval: float = 5.0):
+        self.interval = interval
+        self._counts: Dict[int, int] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._pool = None
+
+    def increment(self, proposal_id: int, views: int = 1):
+        self._counts[proposal_id] = self._counts.get(proposal_id, 0) + views
+
+    def pending(self, proposal_id: int) -> int:
+        """Views recorded for a proposal but not yet written to the database"""
+        return self._counts.get(proposal_id, 0)
+
+    async def flush(self, pool=None):
+        pool = pool or self._pool
+        if not self._counts or pool is None:
+            return
+        counts, self._counts = self._counts, {}
+        try:
+            async with pool.acquire() as connection:
+                await connection.execute(FLUSH_QUERY, list(counts), list(counts.values()))
+            logger.debug(f"👁️ Flushed views for {len(counts)} proposals")
+        except BaseException as e:
+            # Put the deltas back so the next flush retries them; this includes
+            # cancellation, which would otherwise drop the swapped-out counts
+            for proposal_id, views in counts.items():
+                self.increment(proposal_id, views)
+            if not isinstance(e, Exception):
+                raise
+            logger.error(f"❌ Failed to flush proposal views: {e}")
+
+    def start(self, pool):
+        self._pool = pool
+        if self._task is None:
+            self._stopping = asyncio.Event()
+            self._task = asyncio.create_task(self._flush_periodically())
+
+    async def stop(self):
+        if self._task is not None:
+            # Let a flush that is already running finish instead of cancelling it
+            self._stopping.set()
+            await self._task
+            self._task = None
+        await self.flush()
+        self._pool = None
+
+    async def _flush_periodically(self):
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.interval)
+            except asyncio.TimeoutError:
+                await self.flush()